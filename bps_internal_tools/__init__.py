@@ -8,7 +8,6 @@ from .admin import admin_bp
 from .toc_attendance import toc_bp
 from .sis_sync import sis_sync_bp
 from .security import set_security_headers
-from .extensions import oauth
 
 def create_app(config_name=None):
     app = Flask(__name__, template_folder="templates", static_folder="static")
@@ -16,17 +15,27 @@ def create_app(config_name=None):
     
     set_security_headers(app)
 
+    from bps_internal_tools import static_assets
+    # Registered first so its after_request (compression) runs last
+    static_assets.init_app(app)
+
     # init extensions
     db.init_app(app)
 
-    oauth.init_app(app)
-    oauth.register(
-        name="google",
-        server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-        client_id=app.config["GOOGLE_CLIENT_ID"],
-        client_secret=app.config["GOOGLE_CLIENT_SECRET"],
-        client_kwargs={"scope": "openid email profile"},
-    )
+    from bps_internal_tools import sqlite_tuning
+    sqlite_tuning.init_app(app)
+
+    from bps_internal_tools import metrics, profiler, sql_instrumentation, tracing
+    tracing.init_app(app)
+    metrics.init_app(app)
+    sql_instrumentation.init_app(app)
+    profiler.init_app(app)
+
+    from bps_internal_tools.services import attendance_queue, breaker, replica, sync
+    breaker.init_app(app)
+    replica.init_app(app)
+    sync.init_app(app)
+    attendance_queue.init_app(app)
 
     # blueprints
     # app.register_blueprint(auth_bp)    # if you split login routes
@@ -50,12 +59,12 @@ def create_app(config_name=None):
 
     # context processors (version info, copyright)
     from bps_internal_tools.services.utils import get_version_info
+    vi = get_version_info()
+    github_repo = "https://github.com/brockton-school/bps_internal_tools"
+    commit_url = f"{github_repo}/commit/{vi['commit']}" if vi.get('commit') not in (None, "unknown") else None
+    version_url = f"{github_repo}/releases/tag/{vi['version']}" if vi.get('version') not in (None, "unknown") else None
     @app.context_processor
     def inject_footer_info():
-        vi = get_version_info()
-        github_repo = "https://github.com/brockton-school/bps_internal_tools"
-        commit_url = f"{github_repo}/commit/{vi['commit']}" if vi.get('commit') not in (None, "unknown") else None
-        version_url = f"{github_repo}/releases/tag/{vi['version']}" if vi.get('version') not in (None, "unknown") else None
         return {
             "version_info": vi.get('version'),
             "version_url": version_url,
@@ -74,6 +83,12 @@ def create_app(config_name=None):
         return "".join(p[0] for p in parts[:2]).upper()
     
     from sqlalchemy import text
+    # Liveness: the process is up and serving; never touches the DB
+    @app.route("/livez")
+    def livez():
+        return {"status": "ok"}, 200
+
+    # Readiness: the DB is reachable
     @app.route("/health")
     def health():
         try:
@@ -1,39 +1,41 @@
-from flask import render_template, request, redirect, url_for, flash
+from flask import render_template, request, redirect, url_for, flash, abort, send_file
 from bps_internal_tools.services.auth import (
-    load_users,
+    admin_stats,
     load_roles,
+    search_users,
     add_user, 
     update_user, 
     delete_user, 
     add_role, 
     update_role, 
     delete_role,
+    current_user,
     tool_required)
 from bps_internal_tools.services.settings import (
+    get_active_terms,
     get_system_timezone,
     list_supported_timezones,
     set_system_timezone,
 )
 from bps_internal_tools.tools_registry import all_tools, tool_slugs
 from bps_internal_tools.models import GradeSection
+from bps_internal_tools.profiler import list_profiles, profile_path
+from bps_internal_tools.services.cache import bump_reference_version
+from bps_internal_tools.services.locks import LockBusy
+from bps_internal_tools.services.teacher_courses import count_teacher_courses, set_active_terms
 from bps_internal_tools.extensions import db
 from . import admin_bp, TOOL_SLUG
 
 @admin_bp.route("/settings", methods=["GET"])
 @tool_required(TOOL_SLUG)
 def settings_home():
-    users = load_users()
-    roles = load_roles()
     return render_template(
         "admin/settings_home.html",
-        stats={
-            "user_count": len(users),
-            "active_users": sum(1 for u in users.values() if u["active"]),
-            "role_count": len(roles),
-            "active_roles": sum(1 for r in roles.values() if r["active"]),
-        },
+        stats=admin_stats(),
         current_timezone = get_system_timezone(),
         timezone_options = list_supported_timezones(),
+        active_terms = get_active_terms(),
+        teacher_course_count = count_teacher_courses(),
         page_title = "Admin · Settings",
         page_subtitle = "Manage platform settings",
         active_tool = "Settings"
@@ -67,6 +69,20 @@ def update_timezone():
         flash(f"System timezone set to {timezone}", "ok")
     return redirect(url_for("admin.settings_home"))
 
+@admin_bp.route("/settings/terms", methods=["POST"])
+@tool_required(TOOL_SLUG)
+def update_active_terms():
+    user = current_user() or {}
+    try:
+        terms = set_active_terms(request.form.get("terms") or "", trigger=f"settings:{user.get('username', '')}")
+    except ValueError as exc:
+        flash(str(exc), "error")
+    except LockBusy:
+        flash("Terms saved; the course picker updates when the running import finishes", "ok")
+    else:
+        flash(f"Active terms set to {', '.join(terms)}", "ok")
+    return redirect(url_for("admin.settings_home"))
+
 @admin_bp.route("/settings/roles/create", methods=["POST"])
 @tool_required(TOOL_SLUG)
 def create_role():
@@ -108,10 +124,20 @@ def delete_role_route(role):
 @admin_bp.route("/settings/users", methods=["GET"])
 @tool_required(TOOL_SLUG)
 def users_page():
-    users = sorted(load_users().values(), key=lambda u: u["username"])
+    filters = {
+        "q": (request.args.get("q") or "").strip(),
+        "role": request.args.get("role") or "",
+        "provider": request.args.get("provider") or "",
+    }
+    after = request.args.get("after") or None
+    users, next_after = search_users(after=after, **filters)
     roles = sorted(load_roles().values(), key=lambda r: r["role"])
+    active_filters = {k: v for k, v in filters.items() if v}
     return render_template("admin/users.html",
                            users=users, roles=roles,
+                           filters=filters,
+                           first_url=url_for("admin.users_page", **active_filters) if after else None,
+                           next_url=url_for("admin.users_page", after=next_after, **active_filters) if next_after else None,
                            page_title="Admin · Users",
                            page_subtitle="Create users and assign roles",
                            active_tool="Settings")
@@ -178,6 +204,7 @@ def create_grade_section_route():
         reference_is_section=reference_is_section,
     )
     db.session.add(section)
+    bump_reference_version()
     db.session.commit()
     flash(f"Grade section '{display_name}' created", "ok")
     return redirect(url_for("admin.grade_sections_page"))
@@ -191,6 +218,7 @@ def update_grade_section_route(section_id):
     section.school_level = (request.form.get("school_level") or "").strip() or None
     section.reference_course_id = (request.form.get("reference_course_id") or "").strip() or None
     section.reference_is_section = bool(request.form.get("reference_is_section"))
+    bump_reference_version()
     db.session.commit()
     flash(f"Grade section '{section.display_name}' updated", "ok")
     return redirect(url_for("admin.grade_sections_page"))
@@ -201,6 +229,29 @@ def update_grade_section_route(section_id):
 def delete_grade_section_route(section_id):
     section = GradeSection.query.get_or_404(section_id)
     db.session.delete(section)
+    bump_reference_version()
     db.session.commit()
     flash(f"Grade section '{section.display_name}' deleted", "ok")
-    return redirect(url_for("admin.grade_sections_page"))
\ No newline at end of file
+    return redirect(url_for("admin.grade_sections_page"))
+
+
+# --- Request profiles ---
+@admin_bp.route("/settings/profiles", methods=["GET"])
+@tool_required(TOOL_SLUG)
+def profiles_page():
+    return render_template(
+        "admin/profiles.html",
+        profiles=list_profiles(),
+        page_title="Admin · Profiles",
+        page_subtitle="Sampled request profiles",
+        active_tool="Settings",
+    )
+
+
+@admin_bp.route("/settings/profiles/<name>", methods=["GET"])
+@tool_required(TOOL_SLUG)
+def download_profile(name):
+    path = profile_path(name)
+    if not path:
+        abort(404)
+    return send_file(path, mimetype="text/plain", as_attachment=True, download_name=name)
@@ -1,32 +1,46 @@
 from flask import Blueprint, redirect, render_template, url_for, request, session, abort, current_app, flash
-from sqlalchemy import select, func
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 import re
-from werkzeug.security import check_password_hash
 
 from . import auth_bp
 
-from bps_internal_tools.extensions import db, oauth
-from bps_internal_tools.models import User, Role, RoleTool, People  # People = Canvas users table
+from bps_internal_tools.extensions import db, google_oauth
+from bps_internal_tools.metrics import external_call
+from bps_internal_tools.models import Role, User, People, normalize_email  # People = Canvas users table
+from bps_internal_tools.services.passwords import PasswordHashBusy, hash_password, needs_rehash, verify_password
 
 def current_user():
     return session.get("user")
 
-def _ensure_role(name: str):
-    r = db.session.execute(select(Role).where(Role.name == name)).scalar_one_or_none()
-    if not r:
-        r = Role(name=name, active=True)
-        db.session.add(r)
-        db.session.commit()
-    return r
+# Roles known to exist in this process, so only a worker's first Google
+# sign-up per role checks for it
+_known_roles = set()
+
+def _ensure_role(name: str) -> None:
+    """Create role *name* if it's missing; the caller commits.
+
+    Migration d2a7f9c03b81 creates the default roles, but a schema built with
+    ``create_all()`` (importer script, fresh SQLite) has none.
+    """
+    if name in _known_roles:
+        return
+    if db.session.execute(select(Role.id).where(Role.name == name)).first() is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(Role(name=name, active=True))
+        except IntegrityError:
+            pass  # another worker created it first
+    _known_roles.add(name)
 
 def _assign_default_role_for_email(local_part: str) -> str:
     return "student_lite" if re.search(r"\d", local_part) else "staff_lite"
 
 def _find_canvas_user_id_by_email(email: str):
-    row = db.session.execute(
-        select(People.user_id).where(func.lower(People.email) == email.lower())
-    ).first()
-    return row[0] if row else None
+    # Unique index on email_normalized: a single index lookup
+    return db.session.execute(
+        select(People.user_id).where(People.email_normalized == normalize_email(email))
+    ).scalar_one_or_none()
 
 # ---------- Local + Google combined login ----------
 
@@ -50,10 +64,23 @@ def login():
             select(User).where(User.username == username, User.active == True)  # noqa: E712
         ).scalar_one_or_none()
 
-        if not u or not u.password_hash or not check_password_hash(u.password_hash, password):
+        try:
+            ok = bool(u) and verify_password(u.password_hash, password)
+        except PasswordHashBusy:
+            flash("Sign-in is busy right now. Please try again in a moment.", "error")
+            return render_template("auth/login.html", next_url=next_url), 503
+        if not ok:
             flash("Invalid username or password.", "error")
             return render_template("auth/login.html", next_url=next_url)
 
+        if needs_rehash(u.password_hash):
+            # Hash parameters changed since this password was set
+            try:
+                u.password_hash = hash_password(password)
+                db.session.commit()
+            except PasswordHashBusy:
+                current_app.logger.info("Skipped password rehash for %s; hashing busy", u.username)
+
         # Build session payload (same structure used across the app)
         session["user"] = {
             "username": u.username,
@@ -72,12 +99,16 @@ def login_google():
     next_url = request.args.get("next") or url_for("tools_index")
     session["post_login_redirect"] = next_url
     redirect_uri = current_app.config["OAUTH_REDIRECT_URI"]
-    return oauth.google.authorize_redirect(redirect_uri)
+    # First call also fetches Google's discovery document
+    with external_call("google_oauth", "authorize_redirect"):
+        return google_oauth().authorize_redirect(redirect_uri)
 
 @auth_bp.route("/google/callback")
 def google_callback():
-    token = oauth.google.authorize_access_token()
-    userinfo = token.get("userinfo") or oauth.google.parse_id_token(token)
+    with external_call("google_oauth", "token"):
+        google = google_oauth()
+        token = google.authorize_access_token()
+        userinfo = token.get("userinfo") or google.parse_id_token(token)
 
     email = (userinfo.get("email") or "").strip().lower()
     email_verified = userinfo.get("email_verified", False)
@@ -89,16 +120,12 @@ def google_callback():
     display_name = userinfo.get("name") or email.split("@", 1)[0]
     local_part = email.split("@", 1)[0]
 
-    # Ensure default roles exist
-    _ensure_role("staff_lite")
-    _ensure_role("student_lite")
     default_role = _assign_default_role_for_email(local_part)
 
-    # Try to link to Canvas user
-    canvas_user_id = _find_canvas_user_id_by_email(email)
-
     # Upsert users_auth
     u = db.session.execute(select(User).where(User.username == email)).scalar_one_or_none()
+    if not u or not u.role_name:
+        _ensure_role(default_role)
     if not u:
         u = User(
             username=email,
@@ -107,14 +134,16 @@ def google_callback():
             role_name=default_role,
             active=True,
             auth_provider="google",
-            canvas_user_id=canvas_user_id,
+            # Existing users are kept linked by the import jobs (services.people)
+            canvas_user_id=_find_canvas_user_id_by_email(email),
         )
         db.session.add(u)
     else:
+        if u.auth_provider != "google":
+            # First Google sign-in for a local account
+            u.canvas_user_id = _find_canvas_user_id_by_email(email)
         u.display_name = display_name
         u.auth_provider = "google"
-        if not u.canvas_user_id and canvas_user_id:
-            u.canvas_user_id = canvas_user_id
         if not u.role_name:
             u.role_name = default_role
     db.session.commit()
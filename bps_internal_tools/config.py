@@ -9,7 +9,31 @@ class BaseConfig:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": True}
+    # The pool bounds how many requests use the DB at once, which matters most
+    # with gevent workers where far more requests are in flight than threads.
+    # A local SQLite file has no server connection to go stale, so no pre-ping,
+    # and one pooled connection per request thread (WAL lets them read at once)
+    _sqlite = SQLALCHEMY_DATABASE_URI.startswith("sqlite")
+    SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": not _sqlite}
+    if SQLALCHEMY_DATABASE_URI not in ("sqlite://", "sqlite:///:memory:"):  # in-memory DBs use StaticPool
+        SQLALCHEMY_ENGINE_OPTIONS.update(
+            pool_size=int(os.getenv("DB_POOL_SIZE", os.getenv("GUNICORN_THREADS", "4") if _sqlite else "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        )
+    # Per-connection SQLite pragmas (see sqlite_tuning.py); ignored for other databases
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+    # Optional read replica for roster/search/course lookups (see services/replica.py)
+    REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+    SQLALCHEMY_BINDS = {"replica": REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    # After a write, the browser session reads from the primary for this long
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+    # How often each process compares the replica's data_version with the primary's
+    REPLICA_CHECK_SECONDS = int(os.getenv("REPLICA_CHECK_SECONDS", "5"))
     GOOGLE_SHEET_ID = os.getenv('GOOGLE_SHEET_ID')
     GOOGLE_CREDENTIALS_PATH = os.getenv('GOOGLE_CREDENTIALS_PATH')
     SESSION_COOKIE_HTTPONLY = True
@@ -18,13 +42,73 @@ class BaseConfig:
     GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
     GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
     OAUTH_REDIRECT_URI = os.getenv("OAUTH_REDIRECT_URI")  # https://.../auth/google/callback
+    GOOGLE_DISCOVERY_URL = os.getenv("GOOGLE_DISCOVERY_URL", "https://accounts.google.com/.well-known/openid-configuration")
+    # Google discovery document + JWKS shared by all workers (see services/oidc.py)
+    OIDC_CACHE_DIR = os.getenv("OIDC_CACHE_DIR", "env/oidc_cache")
+    OIDC_CACHE_TTL_SECONDS = int(os.getenv("OIDC_CACHE_TTL_SECONDS", "86400"))
     ALLOWED_DOMAIN = os.getenv("ALLOWED_DOMAIN", "brocktonschool.com")
     CANVAS_API_URL = os.getenv("CANVAS_API_URL")
     CANVAS_API_TOKEN = os.getenv("CANVAS_API_TOKEN")
     CANVAS_ACCOUNT_ID = os.getenv("CANVAS_ACCOUNT_ID", "1")
+    # Rosters older than this are re-fetched from Canvas before taking attendance (0 disables)
+    ROSTER_TTL_SECONDS = int(os.getenv("ROSTER_TTL_SECONDS", "900"))
+    # Scheduled Canvas report import (0 disables the in-app scheduler)
+    CANVAS_SYNC_INTERVAL_MINUTES = int(os.getenv("CANVAS_SYNC_INTERVAL_MINUTES", "0"))
+    # How often the scheduler sends attendance queued during a Sheets outage (0 disables)
+    ATTENDANCE_REPLAY_INTERVAL_SECONDS = int(os.getenv("ATTENDANCE_REPLAY_INTERVAL_SECONDS", "300"))
+    # Set to "false" when a companion `flask canvas-sync --loop` process runs the schedule
+    CANVAS_SYNC_IN_APP = os.getenv("CANVAS_SYNC_IN_APP", "true").lower() == "true"
+    CANVAS_REPORT_TYPE = os.getenv("CANVAS_REPORT_TYPE", "provisioning_csv")
+    CANVAS_REPORT_DIR = os.getenv("CANVAS_REPORT_DIR", "env/canvas_reports")
+    CANVAS_REPORT_POLL_SECONDS = float(os.getenv("CANVAS_REPORT_POLL_SECONDS", "5"))
+    CANVAS_REPORT_TIMEOUT_SECONDS = float(os.getenv("CANVAS_REPORT_TIMEOUT_SECONDS", "900"))
+    # Circuit breakers for Sheets and Canvas (see services/breaker.py): open once
+    # BREAKER_FAILURE_RATE of the last BREAKER_WINDOW calls (at least
+    # BREAKER_MIN_CALLS) failed or were slower than BREAKER_SLOW_CALL_SECONDS,
+    # then probe again after BREAKER_RESET_SECONDS. Canvas SIS uploads and
+    # report calls are never counted as slow, only when they fail.
+    BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+    BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+    BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+    BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "10"))
+    BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+    # When set, /metrics requires "Authorization: Bearer <token>"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    # Statements slower than this are logged with their EXPLAIN plan (0 disables)
+    SQL_SLOW_QUERY_MS = int(os.getenv("SQL_SLOW_QUERY_MS", "250"))
+    # A statement run this many times in one request is logged as an N+1 candidate (0 disables)
+    SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "5"))
+    SQL_SERVER_TIMING = os.getenv("SQL_SERVER_TIMING", "false").lower() == "true"
+    # Admin request profiles (?_profile=1): where they're kept, how many, sample rate
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "env/profiles")
+    PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    # Zipkin v2 JSON-lines trace export: a file path or "-" for stdout (unset disables)
+    TRACE_EXPORT = os.getenv("TRACE_EXPORT")
+    # Share of new traces recorded; requests carrying a traceparent follow the caller
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+    # Max seconds before a worker notices settings/grade sections/role changes (0 disables the cache)
+    REFERENCE_CACHE_SECONDS = int(os.getenv("REFERENCE_CACHE_SECONDS", "30"))
+    # Written by scripts/build-static-assets.py; defaults to static/dist/manifest.json
+    STATIC_MANIFEST = os.getenv("STATIC_MANIFEST")
+    # Text responses at least this big are gzipped (0 disables)
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+    # Password hashing (see services/passwords.py); without an iteration count
+    # Werkzeug's default applies. Stored hashes with a lower cost are upgraded
+    # on the next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256")
+    # Hashing processes per gunicorn worker (0 hashes on the request thread)
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    # Hashes running at once per worker; keep below GUNICORN_THREADS so logins
+    # can't hold every request thread
+    PASSWORD_HASH_MAX_CONCURRENCY = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", "2"))
+    # Longest a login waits for a slot, then for its hash, before "busy, retry"
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "0.5"))
+    PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "5"))
 
 class DevConfig(BaseConfig):
     DEBUG = True
+    SQL_SERVER_TIMING = True
 
 class ProdConfig(BaseConfig):
     DEBUG = False
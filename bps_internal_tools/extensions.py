@@ -1,10 +1,64 @@
 # bps_internal_tools/extensions.py
+import threading
+import time
+
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
-from authlib.integrations.flask_client import OAuth
 
 class Base(DeclarativeBase):
     pass
 
 db = SQLAlchemy(model_class=Base)
-oauth = OAuth()
\ No newline at end of file
+
+_oauth_lock = threading.Lock()
+
+def google_oauth():
+    """The Authlib Google client for the current app, registered on first use.
+
+    Authlib is only imported once someone signs in with Google, keeping it
+    out of worker start-up.  Discovery metadata and signing keys come from
+    the shared disk cache in ``services.oidc`` so Authlib doesn't fetch them
+    per worker; if that fails Authlib falls back to fetching them itself.
+    """
+    from bps_internal_tools.services.oidc import google_oidc_documents
+
+    app = current_app._get_current_object()
+    client = app.extensions.get("google_oauth")
+    if client is None:
+        with _oauth_lock:
+            client = app.extensions.get("google_oauth")
+            if client is None:
+                from authlib.integrations.flask_client import OAuth
+
+                oauth = OAuth(app)
+                client = oauth.register(
+                    name="google",
+                    server_metadata_url=app.config["GOOGLE_DISCOVERY_URL"],
+                    client_id=app.config["GOOGLE_CLIENT_ID"],
+                    client_secret=app.config["GOOGLE_CLIENT_SECRET"],
+                    client_kwargs={"scope": "openid email profile"},
+                )
+                app.extensions["google_oauth"] = client
+    try:
+        discovery, jwks = google_oidc_documents()
+    except Exception:
+        app.logger.warning("OIDC metadata cache unavailable; Authlib will fetch it", exc_info=True)
+    else:
+        _apply_cached_metadata(app, client, discovery, jwks)
+    return client
+
+def _apply_cached_metadata(app, client, discovery, jwks):
+    """Copy cached discovery metadata and keys into *client* when the cache changed."""
+    with _oauth_lock:
+        applied_discovery, applied_jwks = app.extensions.get("google_oauth_cached", (None, None))
+        metadata = client.server_metadata
+        if discovery is not applied_discovery:
+            # "_loaded_at" tells Authlib the metadata is already loaded
+            metadata.update(discovery, _loaded_at=time.time())
+        # On a token signed with an unknown key (Google rotated its keys)
+        # Authlib fetches the JWKS itself; that copy is newer than ours
+        current = metadata.get("jwks")
+        if jwks is not applied_jwks and (current is None or current is applied_jwks):
+            metadata["jwks"] = jwks
+        app.extensions["google_oauth_cached"] = (discovery, jwks)
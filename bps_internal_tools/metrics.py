@@ -0,0 +1,191 @@
+# bps_internal_tools/metrics.py
+"""Prometheus metrics for requests, the DB pool, external calls and caches.
+
+Under gunicorn every worker is a separate process, so ``gunicorn.conf.py``
+points ``PROMETHEUS_MULTIPROC_DIR`` at a shared directory and ``/metrics``
+aggregates the per-process files.  Without that variable (``flask run``) the
+default single-process registry is used.
+"""
+
+import hmac
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, abort, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+from bps_internal_tools.extensions import db
+from bps_internal_tools.tracing import span
+
+# Buckets tuned for an app whose pages should render well under a second
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_LATENCY = Histogram(
+    "bps_http_request_duration_seconds",
+    "Time spent handling a request",
+    ["blueprint", "endpoint", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "bps_http_requests_in_flight",
+    "Requests currently being handled",
+    ["blueprint"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "bps_db_pool_connections",
+    "SQLAlchemy pool connections by state",
+    ["bind", "state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "bps_db_pool_size",
+    "Configured SQLAlchemy pool size",
+    ["bind"],
+    multiprocess_mode="livesum",
+)
+EXTERNAL_CALL_LATENCY = Histogram(
+    "bps_external_call_duration_seconds",
+    "Time spent in calls to external services",
+    ["service", "operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "bps_cache_requests_total",
+    "Cache lookups by result",
+    ["cache", "result"],
+)
+BREAKER_STATE = Gauge(
+    "bps_circuit_breaker_state",
+    "Circuit breaker state per external service (0 closed, 1 half-open, 2 open); worst worker",
+    ["service"],
+    multiprocess_mode="livemax",
+)
+BREAKER_REJECTIONS = Counter(
+    "bps_circuit_breaker_rejections_total",
+    "Calls failed fast because a circuit breaker was open",
+    ["service"],
+)
+ROSTER_SKIPPED_ENROLLMENTS = Counter(
+    "bps_roster_skipped_enrollments_total",
+    "Canvas enrollments left out of a roster refresh because the user isn't imported yet",
+)
+
+
+@contextmanager
+def external_call(service: str, operation: str):
+    """Time a call to an external service (``sheets``, ``canvas``, ``google_oauth``).
+
+    The call is also recorded as a ``CLIENT`` tracing span.
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with span(f"{service}.{operation}", kind="CLIENT", **{"peer.service": service}):
+            yield
+        outcome = "ok"
+    finally:
+        EXTERNAL_CALL_LATENCY.labels(service, operation, outcome).observe(time.perf_counter() - start)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a lookup against a named in-process cache."""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_breaker_state(service: str, value: int) -> None:
+    BREAKER_STATE.labels(service).set(value)
+
+
+def record_breaker_rejection(service: str) -> None:
+    BREAKER_REJECTIONS.labels(service).inc()
+
+
+def record_roster_skipped(count: int) -> None:
+    ROSTER_SKIPPED_ENROLLMENTS.inc(count)
+
+
+def _record_pool(bind: str, pool, returning: int = 0) -> None:
+    # Not every pool class tracks these (e.g. SQLite's in-memory pools)
+    if not hasattr(pool, "checkedout"):
+        return
+    DB_POOL_CONNECTIONS.labels(bind, "checked_out").set(max(pool.checkedout() - returning, 0))
+    DB_POOL_CONNECTIONS.labels(bind, "idle").set(pool.checkedin() + returning)
+    DB_POOL_CONNECTIONS.labels(bind, "overflow").set(max(pool.overflow(), 0))
+
+
+def _watch_pools(app) -> None:
+    with app.app_context():
+        engines = dict(db.engines)
+    for key, engine in engines.items():
+        bind = key or "default"
+        size = getattr(engine.pool, "size", None)
+        if size is not None:
+            DB_POOL_SIZE.labels(bind).set(size())
+
+        # Look the pool up on each event: engine.dispose() (e.g. after a
+        # gunicorn fork) swaps in a new one
+        def on_checkout(*_args, _bind=bind, _engine=engine):
+            _record_pool(_bind, _engine.pool)
+
+        def on_checkin(*_args, _bind=bind, _engine=engine):
+            # Fired just before the connection goes back into the pool
+            _record_pool(_bind, _engine.pool, returning=1)
+
+        event.listen(engine, "checkout", on_checkout)
+        event.listen(engine, "checkin", on_checkin)
+
+
+def _registry():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    from prometheus_client import REGISTRY
+    return REGISTRY
+
+
+def init_app(app) -> None:
+    _watch_pools(app)
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        g._metrics_blueprint = request.blueprint or "app"
+        REQUESTS_IN_FLIGHT.labels(g._metrics_blueprint).inc()
+
+    @app.after_request
+    def _observe_latency(resp):
+        start = g.get("_metrics_start")
+        if start is not None:
+            # Unmatched URLs share one label so 404 scans can't blow up cardinality
+            endpoint = request.url_rule.endpoint if request.url_rule else "unmatched"
+            REQUEST_LATENCY.labels(
+                g._metrics_blueprint, endpoint, request.method, str(resp.status_code)
+            ).observe(time.perf_counter() - start)
+        return resp
+
+    @app.teardown_request
+    def _end_in_flight(_exc):
+        blueprint = g.pop("_metrics_blueprint", None)
+        if blueprint is not None:
+            REQUESTS_IN_FLIGHT.labels(blueprint).dec()
+
+    @app.route("/metrics")
+    def metrics():
+        token = current_app.config.get("METRICS_TOKEN")
+        if token:
+            supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+            if not hmac.compare_digest(supplied, token):
+                abort(403)
+        return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
@@ -8,6 +8,7 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     UniqueConstraint,
     Text,
 )
@@ -15,6 +16,11 @@ from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
 
+
+def normalize_email(email):
+    """Lookup form of an email address (``None`` when blank)."""
+    return (email or "").strip().lower() or None
+
 # --- Simple App Settings Store ---
 class AppSetting(db.Model):
     __tablename__ = "app_settings"
@@ -54,6 +60,12 @@ class User(db.Model):
     auth_provider = Column(String(32), nullable=True)  # identifies log in source
     canvas_user_id = Column(String(64), ForeignKey("users_canvas.user_id"), nullable=True)  # adds support for linking Google Users to Canvas
 
+    # Admin users page: filter by role / provider, page by username
+    __table_args__ = (
+        Index("ix_users_auth_role_username", "role_name", "username"),
+        Index("ix_users_auth_provider_username", "auth_provider", "username"),
+    )
+
     
 # --- Canvas-like data ---
 class Course(db.Model):
@@ -83,12 +95,16 @@ class People(db.Model):
     sortable_name = Column(String(255))
     short_name = Column(String(255))
     email = Column(String(255))
+    # normalize_email(email), kept by services.people.sync_email_index
+    email_normalized = Column(String(255))
     status = Column(String(64))
     pronouns = Column(String(255))
     grade = Column(String(64))
     updated_at = Column(DateTime)
     status_changed_at = Column(DateTime)
 
+    __table_args__ = (Index("uq_users_canvas_email_normalized", "email_normalized", unique=True),)
+
 class Enrollment(db.Model):
     __tablename__ = "enrollments"
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -103,6 +119,29 @@ class Enrollment(db.Model):
     temporary_enrollment_source_user_id = Column(String(64))
 
 
+class CourseRosterRefresh(db.Model):
+    """When a course's enrollments were last pulled straight from the Canvas API."""
+    __tablename__ = "course_roster_refreshes"
+    course_id = Column(String(32), primary_key=True)
+    refreshed_at = Column(DateTime, nullable=False)
+
+
+class TeacherCourse(db.Model):
+    """Course picker rows: each teacher's Canvas courses in the active terms.
+
+    Rebuilt from ``courses``/``enrollments`` by
+    :mod:`bps_internal_tools.services.teacher_courses`; the primary key orders
+    a teacher's rows for display.
+    """
+    __tablename__ = "teacher_courses"
+    teacher_id = Column(String(64), primary_key=True)
+    sort_key = Column(String(191), primary_key=True)      # lower-cased display name
+    course_id = Column(String(32), primary_key=True)
+    display_name = Column(Text, nullable=False)           # "short — long"
+
+    __table_args__ = (Index("ix_teacher_courses_course_id", "course_id"),)
+
+
 # ------ A Simple Proxy to Set A Course as the Source of Truth for a Given Grade -------
 class GradeSection(db.Model):
     __tablename__ = "grade_sections"
@@ -134,4 +173,41 @@ class UserChangeLog(db.Model):
     new_value = Column(Text)
     changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
-    import_log = relationship("UserImport", back_populates="changes")
\ No newline at end of file
+    import_log = relationship("UserImport", back_populates="changes")
+
+
+# ------ TOC attendance waiting for Google Sheets ------
+class QueuedAttendance(db.Model):
+    """A submission Sheets couldn't take; replayed by services/attendance_queue.py."""
+    __tablename__ = "attendance_queue"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    submitted_at = Column(DateTime, nullable=False)          # UTC
+    course_name = Column(Text, nullable=False)
+    teachers = Column(Text, nullable=False)                  # JSON list of names
+    absent_students = Column(Text, nullable=False)           # JSON list of names
+    submitted_by = Column(String(255))
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+
+
+# ------ Data import runs (Canvas sync, SIS Sync) ------
+class SyncRun(db.Model):
+    __tablename__ = "sync_runs"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job = Column(String(64), nullable=False, index=True)        # 'canvas_sync', 'sis_import'
+    trigger = Column(String(128))                                # 'schedule', 'cli', 'upload:<user>'
+    status = Column(String(16), nullable=False)                 # 'running', 'ok', 'error'
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime)
+    duration_ms = Column(Integer)
+    host = Column(String(255))
+    detail = Column(Text)
+
+
+class SyncLock(db.Model):
+    """Lease-based lock for databases without advisory locks (e.g. SQLite)."""
+    __tablename__ = "sync_locks"
+    name = Column(String(64), primary_key=True)
+    holder = Column(String(255), nullable=False)
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
@@ -0,0 +1,171 @@
+# bps_internal_tools/profiler.py
+"""Opt-in sampling profiler for single requests.
+
+An admin adds ``?_profile=1`` (or the ``X-BPS-Profile: 1`` header) to any URL
+and the request runs with a background thread sampling its stack every
+``PROFILE_INTERVAL_MS``.  The samples are written in collapsed-stack format
+(``frame;frame;frame count`` per line), which flamegraph.pl, speedscope and
+inferno all read, into ``PROFILE_DIR``.  Only the newest ``PROFILE_KEEP``
+files are kept.  The response carries ``X-Profile-File`` naming the file,
+and Admin · Settings · Profiles lists them for download.
+
+Requests without the switch only pay for the dict lookups in the hook.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app, g, request
+
+PROFILE_SUFFIX = ".folded"
+_NAME_RE = re.compile(r"^(?P<stamp>\d{8}-\d{6}-\d{6})_(?P<endpoint>[\w.]+)_(?P<ms>\d+)ms\.folded$")
+
+
+def _current_frame_source():
+    """Callable returning the current request's innermost frame.
+
+    Under gevent workers requests are greenlets, not threads, so the sampler
+    reads the request greenlet's saved frame; it only sees the request while
+    it is switched out, i.e. mostly where it waits on I/O.
+    """
+    if "gevent" in sys.modules:
+        from gevent import getcurrent, monkey
+
+        if monkey.is_module_patched("threading"):
+            glet = getcurrent()
+            return lambda: glet.gr_frame
+    thread_id = threading.get_ident()
+    return lambda: sys._current_frames().get(thread_id)
+
+
+class SamplingProfiler:
+    """Samples one request's stack on a timer until :meth:`stop` is called."""
+
+    def __init__(self, frame_source, interval: float):
+        self.frame_source = frame_source
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = self.frame_source()
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+
+def _profile_dir() -> str:
+    return current_app.config.get("PROFILE_DIR", "env/profiles")
+
+
+def _requested() -> bool:
+    return "_profile" in request.args or request.headers.get("X-BPS-Profile") == "1"
+
+
+def _allowed() -> bool:
+    from bps_internal_tools.admin import TOOL_SLUG
+    from bps_internal_tools.services.auth import current_user, role_allows_tool
+
+    u = current_user()
+    return bool(u) and role_allows_tool(u.get("role"), TOOL_SLUG)
+
+
+def _save(profiler: SamplingProfiler, elapsed: float) -> str:
+    directory = _profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    endpoint = re.sub(r"[^\w.]", "_", request.endpoint or "unmatched")
+    name = f"{datetime.now():%Y%m%d-%H%M%S-%f}_{endpoint}_{int(elapsed * 1000)}ms{PROFILE_SUFFIX}"
+    tmp = os.path.join(directory, f".{name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(profiler.collapsed())
+    os.replace(tmp, os.path.join(directory, name))
+
+    keep = current_app.config.get("PROFILE_KEEP", 50)
+    existing = sorted(f for f in os.listdir(directory) if f.endswith(PROFILE_SUFFIX))
+    for old in existing[:-keep] if keep else []:
+        try:
+            os.remove(os.path.join(directory, old))
+        except FileNotFoundError:
+            pass
+    return name
+
+
+def list_profiles() -> list[dict]:
+    """Stored profiles, newest first."""
+    directory = _profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    out = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        m = _NAME_RE.match(name)
+        if not m:
+            continue
+        path = os.path.join(directory, name)
+        with open(path, encoding="utf-8") as fh:
+            samples = sum(int(line.rsplit(" ", 1)[1]) for line in fh if line.strip())
+        out.append({
+            "name": name,
+            "created": datetime.strptime(m["stamp"], "%Y%m%d-%H%M%S-%f"),
+            "endpoint": m["endpoint"],
+            "duration_ms": int(m["ms"]),
+            "samples": samples,
+            "size": os.path.getsize(path),
+        })
+    return out
+
+
+def profile_path(name: str) -> str | None:
+    """Absolute path of a stored profile, or ``None`` for unknown/unsafe names."""
+    if not _NAME_RE.match(name):
+        return None
+    path = os.path.abspath(os.path.join(_profile_dir(), name))
+    return path if os.path.isfile(path) else None
+
+
+def init_app(app) -> None:
+    @app.before_request
+    def _maybe_start_profiler():
+        if not _requested() or not _allowed():
+            return
+        profiler = SamplingProfiler(
+            _current_frame_source(), app.config.get("PROFILE_INTERVAL_MS", 5) / 1000
+        )
+        g._profiler = (profiler, time.perf_counter())
+        profiler.start()
+
+    @app.after_request
+    def _finish_profile(resp):
+        running = g.pop("_profiler", None)
+        if running is None:
+            return resp
+        profiler, started = running
+        profiler.stop()
+        resp.headers["X-Profile-File"] = _save(profiler, time.perf_counter() - started)
+        return resp
+
+    @app.teardown_request
+    def _stop_profiler(_exc):
+        running = g.pop("_profiler", None)
+        if running is not None:
+            running[0].stop()
@@ -0,0 +1,176 @@
+"""Keep TOC attendance when Google Sheets is down.
+
+:func:`submit_attendance` logs a submission to Sheets and, if Sheets is
+unavailable (its circuit breaker is open, or the call failed with a network
+error, 429 or 5xx), stores it in ``attendance_queue`` instead so the teacher
+isn't left with an error.  Other errors, such as missing credentials, are
+raised as before: replaying could never fix them.  Queued submissions are
+replayed in order, with their original time, by :func:`replay_queue`, which
+runs
+
+* in the background after the next submission that reaches Sheets (i.e.
+  once Sheets has recovered),
+* every ``ATTENDANCE_REPLAY_INTERVAL_SECONDS`` from the background scheduler
+  in :mod:`bps_internal_tools.services.sync`, so the queue drains even if
+  nobody submits after an outage, and
+* on demand via ``flask attendance-replay``.
+
+A database lock keeps replays in different workers from sending a
+submission twice.
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+import click
+from flask import current_app
+from sqlalchemy import func, select
+
+from bps_internal_tools.extensions import db
+from bps_internal_tools.models import QueuedAttendance
+from bps_internal_tools.services.breaker import BreakerOpen
+from bps_internal_tools.services.locks import LockBusy, advisory_lock
+from bps_internal_tools.services.sheets import is_unavailable, log_attendance
+
+log = logging.getLogger(__name__)
+
+REPLAY_LOCK = "attendance_replay"
+
+_replaying = threading.Lock()  # one background replay per process
+
+
+def submit_attendance(absent_students, course_name, teachers, submitted_by) -> bool:
+    """Log a submission to Sheets, queueing it if Sheets is unavailable.
+
+    Returns:
+        True if it reached Sheets, False if it was queued.
+
+    Raises:
+        Exception: Whatever Sheets raised, if it wasn't an outage.
+    """
+    try:
+        log_attendance(absent_students, course_name, teachers, submitted_by=submitted_by)
+    except BreakerOpen as exc:
+        error = str(exc)
+    except Exception as exc:
+        if not is_unavailable(exc):
+            raise
+        log.warning("Google Sheets unavailable for %s; queueing it: %s", course_name, exc)
+        error = f"{type(exc).__name__}: {exc}"
+    else:
+        if pending_count():
+            start_replay(current_app._get_current_object())
+        return True
+
+    db.session.add(QueuedAttendance(
+        submitted_at=datetime.utcnow(),
+        course_name=course_name,
+        teachers=json.dumps(list(teachers or [])),
+        absent_students=json.dumps([s["full_name"] for s in absent_students]),
+        submitted_by=submitted_by,
+        attempts=1,
+        last_error=error[:4000],
+    ))
+    db.session.commit()
+    return False
+
+
+def pending_count() -> int:
+    return db.session.execute(select(func.count()).select_from(QueuedAttendance)).scalar_one()
+
+
+def replay_queue() -> dict:
+    """Send queued submissions to Sheets, oldest first.
+
+    Replay stops at the first sign that Sheets is unavailable.  A row that
+    fails for any other reason (bad data, a 4xx) gets its ``attempts`` and
+    ``last_error`` updated and is skipped, so it can't block the rows behind
+    it; it stays queued for someone to look at.
+
+    Each submission is written with a single append (see
+    :func:`~bps_internal_tools.services.sheets.log_attendance`), so one that
+    failed is either absent from the sheet or complete, never half there.
+
+    Returns:
+        ``{"sent": n, "remaining": m}``
+
+    Raises:
+        LockBusy: If another process is replaying.
+    """
+    session = db.session
+    sent = 0
+    with advisory_lock(session.get_bind(), REPLAY_LOCK):
+        for row in session.scalars(select(QueuedAttendance).order_by(QueuedAttendance.id)).all():
+            try:
+                log_attendance(
+                    [{"full_name": name} for name in json.loads(row.absent_students)],
+                    row.course_name,
+                    json.loads(row.teachers),
+                    submitted_by=row.submitted_by,
+                    submitted_at=row.submitted_at.replace(tzinfo=timezone.utc),
+                )
+            except Exception as exc:
+                row.attempts += 1
+                row.last_error = f"{type(exc).__name__}: {exc}"[:4000]
+                session.commit()
+                if is_unavailable(exc):
+                    if not isinstance(exc, BreakerOpen):
+                        log.warning("Replaying queued attendance %s failed: %s", row.id, exc)
+                    # Sheets is down again; the rest can wait for the next replay
+                    break
+                # This row can't be sent as it is; don't hold up the others
+                log.exception("Replaying queued attendance %s failed; skipping it", row.id)
+                continue
+            session.delete(row)
+            session.commit()
+            sent += 1
+    return {"sent": sent, "remaining": pending_count()}
+
+
+def replay_pending() -> Optional[dict]:
+    """Run :func:`replay_queue` if anything is queued and no other process is replaying.
+
+    Returns:
+        The :func:`replay_queue` result, or None if there was nothing to do.
+    """
+    if not pending_count():
+        return None
+    try:
+        return replay_queue()
+    except LockBusy:
+        return None
+
+
+def _replay_in_background(app) -> None:
+    try:
+        with app.app_context():
+            result = replay_queue()
+            log.info("Replayed queued attendance: %s sent, %s remaining", result["sent"], result["remaining"])
+    except LockBusy:
+        pass  # another worker is already replaying
+    except Exception:
+        log.exception("Replaying queued attendance failed")
+    finally:
+        _replaying.release()
+
+
+def start_replay(app) -> bool:
+    """Replay the queue on a background thread unless one is already running here."""
+    if not _replaying.acquire(blocking=False):
+        return False
+    threading.Thread(target=_replay_in_background, args=(app,), name="attendance-replay", daemon=True).start()
+    return True
+
+
+def init_app(app) -> None:
+    @app.cli.command("attendance-replay")
+    def attendance_replay_command():
+        """Send attendance queued while Google Sheets was unavailable."""
+        try:
+            result = replay_queue()
+        except LockBusy:
+            raise click.ClickException("Another process is already replaying the queue")
+        click.echo(f"Sent {result['sent']} queued submission(s); {result['remaining']} still queued")
@@ -1,34 +1,76 @@
 import csv, os, tempfile, shutil
 from functools import wraps
 from flask import session, redirect, url_for, request, abort
-from werkzeug.security import check_password_hash, generate_password_hash
-from sqlalchemy import select, delete
+from sqlalchemy import delete, func, or_, select
 from bps_internal_tools.models import User, Role, RoleTool
 from bps_internal_tools.extensions import db
-
-HASH_METHOD = "pbkdf2:sha256"
+from bps_internal_tools.services.cache import bump_reference_version, cached
+from bps_internal_tools.services.passwords import hash_password, needs_rehash, verify_password
+from bps_internal_tools.services.replica import read_bind_arguments
 
 # ---------- Loaders ----------
-def load_users():
-    s = db.session
-    return {
-        u.username: {
-            "username": u.username,
-            "display_name": u.display_name,
-            "role": u.role_name,
-            "active": u.active,
-            "auth_provider": u.auth_provider,
-        }
-        for u in s.execute(select(User)).scalars().all()
-    }
+USERS_PAGE_SIZE = 50
+
+def admin_stats():
+    """User and role counts for the admin dashboard, in one query."""
+    active_users = select(func.count()).select_from(User).where(User.active == True).scalar_subquery()  # noqa
+    active_roles = select(func.count()).select_from(Role).where(Role.active == True).scalar_subquery()  # noqa
+    row = db.session.execute(
+        select(
+            select(func.count()).select_from(User).scalar_subquery(),
+            active_users,
+            select(func.count()).select_from(Role).scalar_subquery(),
+            active_roles,
+        ),
+        bind_arguments=read_bind_arguments(),
+    ).one()
+    return dict(zip(("user_count", "active_users", "role_count", "active_roles"), row))
+
+def search_users(q=None, role=None, provider=None, after=None, limit=USERS_PAGE_SIZE):
+    """One page of users ordered by username, plus the username to continue after.
+
+    Keyset pagination: *after* is the last username of the previous page, so
+    every page is an index range scan however deep it is.
+    """
+    stmt = select(
+        User.username, User.display_name, User.role_name, User.active, User.auth_provider
+    ).order_by(User.username).limit(limit + 1)
+    if q:
+        # % and _ in the search text are literal, not wildcards
+        escaped = q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        stmt = stmt.where(or_(
+            User.username.like(pattern, escape="\\"),
+            func.lower(User.display_name).like(pattern, escape="\\"),
+        ))
+    if role:
+        stmt = stmt.where(User.role_name == role)
+    if provider == "local":
+        stmt = stmt.where(or_(User.auth_provider.is_(None), User.auth_provider == "local"))
+    elif provider:
+        stmt = stmt.where(User.auth_provider == provider)
+    if after:
+        stmt = stmt.where(User.username > after)
+    rows = db.session.execute(stmt, bind_arguments=read_bind_arguments()).all()
+    users = [
+        {"username": u, "display_name": d, "role": r, "active": a, "auth_provider": p}
+        for u, d, r, a, p in rows[:limit]
+    ]
+    next_after = users[-1]["username"] if len(rows) > limit else None
+    return users, next_after
 
 def load_roles():
-    s = db.session
     roles = {}
-    rows = s.execute(select(Role)).scalars().all()
-    for r in rows:
-        tool_rows = s.execute(select(RoleTool.tool_slug).where(RoleTool.role_id == r.id)).scalars().all()
-        roles[r.name] = {"role": r.name, "tools": tool_rows or [], "active": r.active}
+    rows = db.session.execute(
+        select(Role.name, Role.active, RoleTool.tool_slug)
+        .outerjoin(RoleTool, RoleTool.role_id == Role.id)
+        .order_by(Role.name, RoleTool.id),
+        bind_arguments=read_bind_arguments(),
+    ).all()
+    for name, active, slug in rows:
+        role = roles.setdefault(name, {"role": name, "tools": [], "active": active})
+        if slug:
+            role["tools"].append(slug)
     return roles
 
 
@@ -57,35 +99,42 @@ def authenticate(username: str, password: str):
     u = s.execute(
         select(User).where(User.username == username.lower(), User.active == True)  # noqa
     ).scalar_one_or_none()
-    if u and check_password_hash(u.password_hash, password):
+    if u and verify_password(u.password_hash, password):
+        if needs_rehash(u.password_hash):
+            u.password_hash = hash_password(password)
+            s.commit()
         return {"username": u.username, "display_name": u.display_name, "role": u.role_name}
     return None
 
 def current_user():
     return session.get("user")
 
+def _load_role_grants():
+    """{active role name: frozenset of tool slugs} in one query."""
+    grants = {}
+    rows = db.session.execute(
+        select(Role.name, RoleTool.tool_slug)
+        .outerjoin(RoleTool, RoleTool.role_id == Role.id)
+        .where(Role.active == True)  # noqa
+    ).all()
+    for name, slug in rows:
+        grants.setdefault(name, set())
+        if slug:
+            grants[name].add(slug)
+    return {name: frozenset(slugs) for name, slugs in grants.items()}
+
+def role_grants() -> dict:
+    """Cached {active role name: frozenset of tool slugs}."""
+    return cached("role_grants", _load_role_grants)
+
 def role_allows_tool(role_name: str, tool_slug: str) -> bool:
     if not role_name:
         return False
-    s = db.session
-    role = s.execute(
-        select(Role).where(Role.name == role_name, Role.active == True)  # noqa
-    ).scalar_one_or_none()
-    if not role:
+    tools = role_grants().get(role_name)
+    if tools is None:
         return False
-
     # allow '*' (all tools)
-    star = s.execute(
-        select(RoleTool).where(RoleTool.role_id == role.id, RoleTool.tool_slug == "*")
-    ).first()
-    if star:
-        return True
-
-    return bool(
-        s.execute(
-            select(RoleTool).where(RoleTool.role_id == role.id, RoleTool.tool_slug == tool_slug)
-        ).first()
-    )
+    return "*" in tools or tool_slug in tools
 
 def login_required(view):
     @wraps(view)
@@ -115,7 +164,7 @@ def add_user(username, password, display_name, role, active=True):
         raise ValueError("User already exists")
     s.add(User(
         username=username.lower(),
-        password_hash=generate_password_hash(password, method=HASH_METHOD),
+        password_hash=hash_password(password),
         display_name=display_name or username,
         role_name=role,
         active=bool(active),
@@ -129,7 +178,7 @@ def update_user(username, display_name=None, role=None, active=None, new_passwor
     if display_name is not None: u.display_name = display_name or u.username
     if role is not None: u.role_name = role
     if active is not None: u.active = bool(active)
-    if new_password: u.password_hash = generate_password_hash(new_password, method=HASH_METHOD)
+    if new_password: u.password_hash = hash_password(new_password)
     s.commit()
 
 def delete_user(username):
@@ -150,6 +199,7 @@ def add_role(name, tools, active=True):
     else:
         for slug in tools or []:
             s.add(RoleTool(role_id=r.id, tool_slug=slug))
+    bump_reference_version(s)
     s.commit()
 
 
@@ -165,6 +215,7 @@ def update_role(name, tools=None, active=None):
         else:
             for slug in tools:
                 s.add(RoleTool(role_id=r.id, tool_slug=slug))
+    bump_reference_version(s)
     s.commit()
 
 def delete_role(name):
@@ -173,4 +224,5 @@ def delete_role(name):
     if r:
         s.execute(delete(RoleTool).where(RoleTool.role_id == r.id))
         s.delete(r)
+        bump_reference_version(s)
         s.commit()
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""Circuit breakers for external services (Google Sheets, Canvas).
+
+Each breaker watches the last ``BREAKER_WINDOW`` calls to its service.  Once
+at least ``BREAKER_MIN_CALLS`` have been made and ``BREAKER_FAILURE_RATE`` of
+them failed or took longer than ``BREAKER_SLOW_CALL_SECONDS`` (calls that
+are slow by nature opt out, see :meth:`CircuitBreaker.guard`), it opens:
+calls fail immediately with :class:`BreakerOpen` instead of tying up a worker
+thread for a full client timeout.  After ``BREAKER_RESET_SECONDS`` it lets a
+single probe call through (half-open); success closes it again, failure
+re-opens it.
+
+State is per process, so each gunicorn worker decides for itself; the
+``bps_circuit_breaker_state`` gauge reports the worst worker.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from bps_internal_tools.metrics import record_breaker_rejection, record_breaker_state
+
+log = logging.getLogger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+DEFAULTS = {
+    "window": 20,
+    "min_calls": 5,
+    "failure_rate": 0.5,
+    "slow_call_seconds": 10.0,
+    "reset_seconds": 30.0,
+}
+
+
+class BreakerOpen(RuntimeError):
+    """Raised instead of calling a service whose breaker is open."""
+
+    def __init__(self, service: str, retry_after: float):
+        self.service = service
+        self.retry_after = retry_after
+        super().__init__(f"{service.capitalize()} is unavailable; retrying in {math.ceil(retry_after)}s")
+
+
+class CircuitBreaker:
+    def __init__(self, service: str, **settings):
+        self.service = service
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.configure(**{**DEFAULTS, **settings})
+        record_breaker_state(service, _STATE_VALUES[CLOSED])
+
+    def configure(self, *, window, min_calls, failure_rate, slow_call_seconds, reset_seconds) -> None:
+        with self._lock:
+            self.min_calls = min_calls
+            self.failure_rate = failure_rate
+            self.slow_call_seconds = slow_call_seconds
+            self.reset_seconds = reset_seconds
+            self._outcomes = deque(maxlen=window)  # True = failed or slow
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def add_listener(self, fn) -> None:
+        """Call ``fn(service, old_state, new_state)`` after every transition."""
+        self._listeners.append(fn)
+
+    @contextmanager
+    def guard(self, count_slow: bool = True, is_failure=None):
+        """Run the block as one call to the service.
+
+        Exceptions raised in the block propagate and count as failures, or,
+        with *is_failure*, only those it returns true for: errors that say
+        nothing about the service's health (bad credentials, a 403) then
+        count as successes instead of opening the breaker.  With *count_slow*
+        false a slow success still counts as a success, for calls that are
+        slow by nature (uploads, report polling).
+
+        Raises:
+            BreakerOpen: Without running the block, if the breaker is open
+                (or half-open with its probe already in flight).
+        """
+        probe = self._admit()
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as exc:
+            self._record(failed=is_failure is None or bool(is_failure(exc)), probe=probe)
+            raise
+        slow = count_slow and time.perf_counter() - start > self.slow_call_seconds
+        self._record(failed=slow, probe=probe)
+
+    def reset(self) -> None:
+        with self._lock:
+            transition = self._set_state(CLOSED)
+        self._notify(transition)
+
+    def _admit(self) -> bool:
+        transition = None
+        with self._lock:
+            if self._state == OPEN:
+                wait = self._opened_at + self.reset_seconds - time.monotonic()
+                if wait > 0:
+                    record_breaker_rejection(self.service)
+                    raise BreakerOpen(self.service, wait)
+                transition = self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    record_breaker_rejection(self.service)
+                    raise BreakerOpen(self.service, self.reset_seconds)
+                self._probing = True
+                probe = True
+            else:
+                probe = False
+        self._notify(transition)
+        return probe
+
+    def _record(self, *, failed: bool, probe: bool) -> None:
+        with self._lock:
+            if probe:
+                self._probing = False
+                transition = self._set_state(OPEN if failed else CLOSED)
+            else:
+                self._outcomes.append(failed)
+                calls = len(self._outcomes)
+                transition = None
+                if (
+                    self._state == CLOSED
+                    and calls >= self.min_calls
+                    and sum(self._outcomes) / calls >= self.failure_rate
+                ):
+                    transition = self._set_state(OPEN)
+        self._notify(transition)
+
+    def _set_state(self, state: str):
+        # Caller holds the lock
+        old = self._state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state == CLOSED:
+            self._outcomes.clear()
+            self._probing = False
+        if old == state:
+            return None
+        self._state = state
+        record_breaker_state(self.service, _STATE_VALUES[state])
+        return old, state
+
+    def _notify(self, transition) -> None:
+        if transition is None:
+            return
+        old, new = transition
+        log.log(logging.WARNING if new == OPEN else logging.INFO, "Circuit breaker %s: %s -> %s", self.service, old, new)
+        for fn in self._listeners:
+            try:
+                fn(self.service, old, new)
+            except Exception:
+                log.exception("Circuit breaker listener for %s failed", self.service)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+_settings = dict(DEFAULTS)
+
+
+def breaker(service: str) -> CircuitBreaker:
+    """The process-wide breaker for *service*, created on first use."""
+    with _breakers_lock:
+        if service not in _breakers:
+            _breakers[service] = CircuitBreaker(service, **_settings)
+        return _breakers[service]
+
+
+def init_app(app) -> None:
+    cfg = app.config
+    _settings.update(
+        window=cfg.get("BREAKER_WINDOW", DEFAULTS["window"]),
+        min_calls=cfg.get("BREAKER_MIN_CALLS", DEFAULTS["min_calls"]),
+        failure_rate=cfg.get("BREAKER_FAILURE_RATE", DEFAULTS["failure_rate"]),
+        slow_call_seconds=cfg.get("BREAKER_SLOW_CALL_SECONDS", DEFAULTS["slow_call_seconds"]),
+        reset_seconds=cfg.get("BREAKER_RESET_SECONDS", DEFAULTS["reset_seconds"]),
+    )
+    with _breakers_lock:
+        for existing in _breakers.values():
+            existing.configure(**_settings)
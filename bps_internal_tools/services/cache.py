@@ -0,0 +1,110 @@
+"""Process-wide cache for settings and reference data.
+
+Timezone and other app settings, grade sections and role → tool grants
+change a few times a year but are read on nearly every request.  Each worker
+keeps them in memory and checks the ``settings_version`` row in
+``app_settings`` at most once every ``REFERENCE_CACHE_SECONDS``; writers call
+:func:`bump_reference_version` so every worker drops its copy within that
+delay.  The worker that made the change drops its copy as soon as the change
+is committed.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, TypeVar
+
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from bps_internal_tools.extensions import db
+from bps_internal_tools.metrics import record_cache
+from bps_internal_tools.models import AppSetting
+
+REFERENCE_VERSION_KEY = "settings_version"
+# Session.info flag: clear this worker's copy when the session commits
+_CLEAR_ON_COMMIT = "reference_cache_clear"
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_values: dict = {}
+# "generation" changes on every local clear, so a value loaded across one is never stored
+_state = {"version": None, "checked_at": None, "generation": 0}
+
+
+def _current_version():
+    return db.session.execute(
+        select(AppSetting.value).where(AppSetting.key == REFERENCE_VERSION_KEY)
+    ).scalar_one_or_none()
+
+
+def _drop_if_stale() -> None:
+    ttl = current_app.config.get("REFERENCE_CACHE_SECONDS", 30)
+    now = time.monotonic()
+    with _lock:
+        if _state["checked_at"] is not None and now - _state["checked_at"] < ttl:
+            return
+        # Claim the check so concurrent threads don't all query
+        _state["checked_at"] = now
+    version = _current_version()
+    with _lock:
+        if version != _state["version"]:
+            _values.clear()
+            _state["version"] = version
+            _state["generation"] += 1
+
+
+def reference_version():
+    """Current ``settings_version`` stamp, read from the DB (not cached)."""
+    return _current_version()
+
+
+def cached(name: str, loader: Callable[[], T]) -> T:
+    """Return the cached value for *name*, calling *loader* on a miss."""
+    if current_app.config.get("REFERENCE_CACHE_SECONDS", 30) <= 0:
+        return loader()
+    _drop_if_stale()
+    with _lock:
+        if name in _values:
+            record_cache("reference", True)
+            return _values[name]
+        generation = _state["generation"]
+    record_cache("reference", False)
+    value = loader()
+    with _lock:
+        # Don't store a value loaded across an invalidation
+        if _state["generation"] == generation:
+            _values[name] = value
+    return value
+
+
+def clear_local() -> None:
+    with _lock:
+        _values.clear()
+        _state["version"] = _state["checked_at"] = None
+        _state["generation"] += 1
+
+
+def bump_reference_version(session=None) -> None:
+    """Invalidate cached reference data in every worker; the caller commits.
+
+    This worker's copy is dropped once the commit lands: clearing it earlier
+    would let another thread re-cache the rows as they were before it.
+    """
+    session = session or db.session
+    now = datetime.utcnow()
+    session.merge(AppSetting(key=REFERENCE_VERSION_KEY, value=now.strftime("%Y%m%d%H%M%S%f"), updated_at=now))
+    session.info[_CLEAR_ON_COMMIT] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_after_commit(session) -> None:
+    if session.info.pop(_CLEAR_ON_COMMIT, False):
+        clear_local()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session) -> None:
+    session.info.pop(_CLEAR_ON_COMMIT, None)
@@ -1,10 +1,42 @@
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
 import requests
 
+from bps_internal_tools.metrics import external_call
+from bps_internal_tools.services.breaker import BreakerOpen, breaker
+
 
 class CanvasAPIError(Exception):
     """Raised when the Canvas API returns an error response."""
 
 
+def _send(operation: str, method: str, url: str, *, count_slow: bool = True, **kwargs) -> requests.Response:
+    """Make one Canvas request, timed and behind the ``canvas`` circuit breaker.
+
+    Connection errors, timeouts and 5xx responses count against the breaker;
+    other non-OK responses are left for the caller to handle.  Requests that
+    are slow when Canvas is healthy (SIS uploads, reports) pass
+    ``count_slow=False`` so their duration alone never opens the breaker.
+
+    Raises:
+        CanvasAPIError: On a 5xx response, or without calling Canvas while
+            the breaker is open.
+    """
+    try:
+        with breaker("canvas").guard(count_slow=count_slow), external_call("canvas", operation):
+            resp = requests.request(method, url, **kwargs)
+            if resp.status_code >= 500:
+                resp.close()
+                raise CanvasAPIError(resp.text)
+    except BreakerOpen as exc:
+        raise CanvasAPIError(str(exc)) from exc
+    return resp
+
+
 def sis_import(csv_bytes: bytes, *, base_url: str, token: str, account_id: str = "1"):
     """Trigger a SIS import in Canvas for the provided CSV data.
 
@@ -19,13 +51,281 @@ def sis_import(csv_bytes: bytes, *, base_url: str, token: str, account_id: str =
     """
     files = {"attachment": ("users.csv", csv_bytes, "text/csv")}
     headers = {"Authorization": f"Bearer {token}"}
-    resp = requests.post(
+    resp = _send(
+        "sis_import",
+        "POST",
         f"{base_url}/api/v1/accounts/{account_id}/sis_imports",
         headers=headers,
         data={"import_type": "instructure_csv"},
         files=files,
         timeout=30,
+        count_slow=False,
     )
     if not resp.ok:
         raise CanvasAPIError(resp.text)
-    return resp
\ No newline at end of file
+    return resp
+
+
+# --- Account reports (provisioning / SIS export) ---
+
+REPORT_DONE_STATES = {"complete"}
+REPORT_FAILED_STATES = {"error", "aborted", "deleted"}
+
+
+def start_account_report(
+    report: str,
+    *,
+    base_url: str,
+    token: str,
+    account_id: str = "1",
+    tables=("courses", "enrollments"),
+    term_id: str | None = None,
+) -> dict:
+    """Ask Canvas to start generating an account report.
+
+    Args:
+        report: Report type, e.g. ``provisioning_csv`` or ``sis_export_csv``.
+        base_url: Base URL for the Canvas instance.
+        token: API token with report permissions on the account.
+        account_id: Canvas account ID to target.
+        tables: Which CSVs to include (``courses``, ``enrollments``, ``users``...).
+        term_id: Optional Canvas term id to restrict the report to.
+
+    Returns:
+        The Canvas report object (contains ``id`` and ``status``).
+
+    Raises:
+        CanvasAPIError: If Canvas responds with a non-OK status code.
+    """
+    data = {f"parameters[{t}]": "true" for t in tables}
+    if term_id:
+        data["parameters[enrollment_term_id]"] = term_id
+    resp = _send(
+        "start_report",
+        "POST",
+        f"{base_url}/api/v1/accounts/{account_id}/reports/{report}",
+        headers={"Authorization": f"Bearer {token}"},
+        data=data,
+        timeout=30,
+        count_slow=False,
+    )
+    if not resp.ok:
+        raise CanvasAPIError(resp.text)
+    return resp.json()
+
+
+def get_account_report(report: str, report_id, *, base_url: str, token: str, account_id: str = "1") -> dict:
+    """Return the current state of an account report."""
+    resp = _send(
+        "report_status",
+        "GET",
+        f"{base_url}/api/v1/accounts/{account_id}/reports/{report}/{report_id}",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=30,
+        count_slow=False,
+    )
+    if not resp.ok:
+        raise CanvasAPIError(resp.text)
+    return resp.json()
+
+
+def wait_for_account_report(
+    report: str,
+    report_id,
+    *,
+    base_url: str,
+    token: str,
+    account_id: str = "1",
+    poll_interval: float = 5.0,
+    timeout: float = 900.0,
+) -> dict:
+    """Poll an account report until Canvas finishes generating it.
+
+    Raises:
+        CanvasAPIError: If the report fails or is not ready within *timeout* seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        info = get_account_report(report, report_id, base_url=base_url, token=token, account_id=account_id)
+        status = info.get("status")
+        if status in REPORT_DONE_STATES:
+            return info
+        if status in REPORT_FAILED_STATES:
+            raise CanvasAPIError(f"Report {report}/{report_id} finished with status '{status}'")
+        if time.monotonic() >= deadline:
+            raise CanvasAPIError(f"Timed out waiting for report {report}/{report_id} (last status '{status}')")
+        time.sleep(poll_interval)
+
+
+def download_report_file(report_info: dict, dest_path: str, *, token: str, chunk_size: int = 1024 * 1024) -> str:
+    """Stream a finished report's attachment to *dest_path*.
+
+    The download is written in chunks to a temporary file next to
+    *dest_path* and renamed into place once complete, so a partial download is
+    never mistaken for a finished report.
+
+    Returns:
+        The path the file was written to.
+    """
+    attachment = report_info.get("attachment") or {}
+    url = attachment.get("url") or report_info.get("file_url")
+    if not url:
+        raise CanvasAPIError("Report has no downloadable attachment")
+
+    tmp_path = f"{dest_path}.part"
+    with _send(
+        "report_download", "GET", url,
+        headers={"Authorization": f"Bearer {token}"}, stream=True, timeout=60, count_slow=False,
+    ) as resp:
+        if not resp.ok:
+            raise CanvasAPIError(f"Report download failed with HTTP {resp.status_code}")
+        with open(tmp_path, "wb") as fh:
+            for chunk in resp.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    fh.write(chunk)
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+
+def fetch_account_report(
+    report: str,
+    dest_path: str,
+    *,
+    base_url: str,
+    token: str,
+    account_id: str = "1",
+    tables=("courses", "enrollments"),
+    term_id: str | None = None,
+    poll_interval: float = 5.0,
+    timeout: float = 900.0,
+) -> str:
+    """Request an account report, wait for it and stream it to *dest_path*.
+
+    Canvas returns a zip archive when more than one table is requested and a
+    single CSV otherwise.
+
+    Returns:
+        The path of the downloaded file.
+    """
+    started = start_account_report(
+        report,
+        base_url=base_url,
+        token=token,
+        account_id=account_id,
+        tables=tables,
+        term_id=term_id,
+    )
+    info = wait_for_account_report(
+        report,
+        started["id"],
+        base_url=base_url,
+        token=token,
+        account_id=account_id,
+        poll_interval=poll_interval,
+        timeout=timeout,
+    )
+    return download_report_file(info, dest_path, token=token)
+
+
+# --- Paginated REST reads ---
+
+ENROLLMENT_TYPE_ROLES = {
+    "StudentEnrollment": "student",
+    "TeacherEnrollment": "teacher",
+    "TaEnrollment": "ta",
+    "ObserverEnrollment": "observer",
+    "DesignerEnrollment": "designer",
+}
+
+
+def _with_page(url: str, page: int) -> str:
+    parts = urlsplit(url)
+    query = parse_qs(parts.query)
+    query["page"] = [str(page)]
+    return urlunsplit(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def _last_page_number(resp) -> int | None:
+    last = resp.links.get("last", {}).get("url")
+    if not last:
+        return None
+    try:
+        return int(parse_qs(urlsplit(last).query)["page"][0])
+    except (KeyError, ValueError, IndexError):
+        # Bookmark-style pagination ("page=bookmark:...") can't be fanned out
+        return None
+
+
+def get_paginated(url: str, *, token: str, params=None, max_workers: int = 4, timeout: float = 15) -> list:
+    """Fetch every page of a Canvas list endpoint.
+
+    Pagination follows the ``Link`` response header.  When Canvas advertises a
+    numbered ``last`` page, the remaining pages are fetched concurrently;
+    otherwise ``next`` links are followed one at a time.
+
+    Raises:
+        CanvasAPIError: If any page responds with a non-OK status code.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def fetch(page_url, page_params=None):
+        resp = _send("list_page", "GET", page_url, headers=headers, params=page_params, timeout=timeout)
+        if not resp.ok:
+            raise CanvasAPIError(resp.text)
+        return resp
+
+    first = fetch(url, params)
+    items = list(first.json())
+
+    last_page = _last_page_number(first)
+    next_url = first.links.get("next", {}).get("url")
+    if last_page and last_page > 1 and next_url:
+        urls = [_with_page(next_url, n) for n in range(2, last_page + 1)]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as pool:
+            # Copy the context per page so tracing spans keep their parent
+            futures = [pool.submit(contextvars.copy_context().run, fetch, u) for u in urls]
+            for resp in (f.result() for f in futures):
+                items.extend(resp.json())
+        return items
+
+    while next_url:
+        resp = fetch(next_url)
+        items.extend(resp.json())
+        next_url = resp.links.get("next", {}).get("url")
+    return items
+
+
+def get_course_enrollments(course_id: str, *, base_url: str, token: str, max_workers: int = 4) -> list[dict]:
+    """Return a course's enrollments shaped like rows of ``enrollments.csv``.
+
+    Args:
+        course_id: SIS course id (e.g. ``c003936``).
+        base_url: Base URL for the Canvas instance.
+        token: API token with read access to the course.
+        max_workers: Maximum number of pages fetched at once.
+
+    Raises:
+        CanvasAPIError: If Canvas responds with a non-OK status code.
+    """
+    raw = get_paginated(
+        f"{base_url}/api/v1/courses/sis_course_id:{course_id}/enrollments",
+        token=token,
+        params={"per_page": 100, "state[]": ["active", "invited"]},
+        max_workers=max_workers,
+    )
+    rows = []
+    for e in raw:
+        user_id = e.get("sis_user_id") or (e.get("user") or {}).get("sis_user_id")
+        if not user_id:
+            continue
+        rows.append({
+            "course_id": course_id,
+            "user_id": user_id,
+            "role": ENROLLMENT_TYPE_ROLES.get(e.get("type"), (e.get("role") or "").lower() or None),
+            "role_id": e.get("role_id"),
+            "section_id": e.get("sis_section_id"),
+            "status": e.get("enrollment_state"),
+            "limit_section_privileges": str(e["limit_privileges_to_course_section"]).lower()
+            if e.get("limit_privileges_to_course_section") is not None else None,
+        })
+    return rows
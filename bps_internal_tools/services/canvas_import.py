@@ -0,0 +1,172 @@
+"""Apply Canvas SIS exports / provisioning reports to the database.
+
+Used by ``scripts/update-db-from-canvas.py`` and the scheduled in-app sync:
+
+* ``courses`` rows with matching primary keys are **updated** – only the
+  columns present in the CSV are touched – and rows missing from the CSV are
+  **removed**.
+* ``enrollments`` is replaced entirely with the contents of the CSV.
+"""
+
+import logging
+import os
+import zipfile
+from contextlib import ExitStack
+from datetime import datetime
+from typing import IO, Optional, Type, Union
+
+import pandas as pd
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from bps_internal_tools.models import AppSetting, Course, Enrollment
+from bps_internal_tools.services.canvas import fetch_account_report
+from bps_internal_tools.services.settings import CANVAS_IMPORT_SETTING_KEY
+
+log = logging.getLogger(__name__)
+
+
+def load_csv(path: Union[str, IO[bytes]]) -> Optional[pd.DataFrame]:
+    """Load a CSV file (path or open binary file) into a DataFrame if it exists."""
+    if isinstance(path, str) and not os.path.exists(path):
+        log.warning("CSV not found: %s", path)
+        return None
+    return pd.read_csv(path, dtype=str)
+
+
+def open_report_member(stack: ExitStack, archive: zipfile.ZipFile, table: str) -> Optional[IO[bytes]]:
+    """Open ``<table>.csv`` inside a report archive as a stream.
+
+    Canvas puts members in a folder in some reports, so match the file name
+    only, and exactly: ``courses`` must not pick up ``xcourses.csv``.
+    """
+    for name in archive.namelist():
+        if os.path.basename(name) == f"{table}.csv":
+            return stack.enter_context(archive.open(name))
+    log.warning("%s.csv not found in report archive", table)
+    return None
+
+
+def model_rows(model, df: pd.DataFrame, pk: Optional[str] = None):
+    """Yield row dicts from *df* limited to *model*'s columns.
+
+    Provisioning reports carry extra ``canvas_*`` columns and rows for objects
+    without a SIS id; those columns are dropped and, when *pk* is given, rows
+    without a primary key are skipped.
+    """
+    columns = [c for c in df.columns if c in model.__table__.columns.keys()]
+    for _, row in df[columns].iterrows():
+        data = {k: (None if pd.isna(v) else v) for k, v in row.items()}
+        if pk and data.get(pk) is None:
+            continue
+        yield data
+
+
+def upsert_from_df(session: Session, model: Type, df: pd.DataFrame, pk: str) -> None:
+    """Upsert rows from *df* into *model* and remove missing rows."""
+    if df is None:
+        return
+
+    csv_ids = set()
+    for data in model_rows(model, df, pk):
+        pk_val = data[pk]
+        csv_ids.add(pk_val)
+        obj = session.get(model, pk_val)
+        if obj:
+            for col, val in data.items():
+                setattr(obj, col, val)
+        else:
+            session.add(model(**data))
+
+    session.flush()
+    # Remove rows not present in the CSV
+    if csv_ids:
+        session.query(model).filter(~getattr(model, pk).in_(csv_ids)).delete(
+            synchronize_session=False
+        )
+    session.commit()
+
+
+def replace_enrollments(session: Session, df: pd.DataFrame) -> None:
+    """Replace the enrollments table contents with *df* (mirror CSV)."""
+    if df is None:
+        return
+
+    session.execute(delete(Enrollment))
+
+    # ``bulk_insert_mappings`` can't handle NaN values – they must be converted
+    # to ``None`` so SQLAlchemy can emit proper ``NULL`` values.  Using
+    # ``DataFrame.where`` isn't sufficient for numeric columns because pandas
+    # will coerce ``None`` back to ``NaN`` when the dtype is float, so we build
+    # the row dictionaries manually and filter with :func:`pd.isna`.
+    rows = [
+        data for data in model_rows(Enrollment, df)
+        if data.get("course_id") is not None and data.get("user_id") is not None
+    ]
+
+    if rows:
+        session.bulk_insert_mappings(Enrollment, rows)
+    # Every roster is now as fresh as this import
+    now = datetime.utcnow()
+    session.merge(AppSetting(key=CANVAS_IMPORT_SETTING_KEY, value=now.isoformat(), updated_at=now))
+    session.commit()
+
+
+def import_canvas_export(session: Session, *, csv_dir: Optional[str] = None, archive_path: Optional[str] = None) -> dict:
+    """Import ``courses.csv`` and ``enrollments.csv`` from a directory or report zip.
+
+    Archive members are streamed straight from the zip without extracting.
+
+    Returns:
+        Row counts read from each CSV.
+    """
+    with ExitStack() as stack:
+        if archive_path:
+            archive = stack.enter_context(zipfile.ZipFile(archive_path))
+            courses_src = open_report_member(stack, archive, "courses")
+            enrollments_src = open_report_member(stack, archive, "enrollments")
+        else:
+            courses_src = os.path.join(csv_dir, "courses.csv")
+            enrollments_src = os.path.join(csv_dir, "enrollments.csv")
+
+        courses_df = load_csv(courses_src) if courses_src is not None else None
+        enrollments_df = load_csv(enrollments_src) if enrollments_src is not None else None
+
+    upsert_from_df(session, Course, courses_df, "course_id")
+    replace_enrollments(session, enrollments_df)
+    return {
+        "courses": 0 if courses_df is None else len(courses_df),
+        "enrollments": 0 if enrollments_df is None else len(enrollments_df),
+    }
+
+
+def fetch_canvas_report(
+    dest_dir: str,
+    *,
+    base_url: str,
+    token: str,
+    account_id: str = "1",
+    report: str = "provisioning_csv",
+    term_id: Optional[str] = None,
+    poll_interval: float = 5.0,
+    timeout: float = 900.0,
+) -> str:
+    """Request a Canvas account report and stream it into *dest_dir*.
+
+    Returns:
+        The path of the downloaded archive.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    dest = os.path.join(dest_dir, f"{report}.zip")
+    fetch_account_report(
+        report,
+        dest,
+        base_url=base_url.rstrip("/"),
+        token=token,
+        account_id=account_id,
+        tables=("courses", "enrollments"),
+        term_id=term_id,
+        poll_interval=poll_interval,
+        timeout=timeout,
+    )
+    return dest
@@ -0,0 +1,69 @@
+"""Conditional GET for pages and JSON that only change when data does.
+
+:func:`conditional_get` tags a view's response with an ETag built from the
+data version, the reference-data version, the deployed build, the signed-in
+user and the requested URL, plus any extra stamps the view supplies.  The data
+version moves with every import and every roster refresh that changes
+enrollments (:func:`~bps_internal_tools.services.roster.refresh_course_roster`),
+so pages built from enrollments or ``teacher_courses`` can rely on it.  A
+request whose ``If-None-Match`` matches gets a 304 without the view (and its
+queries) running.  Responses are marked ``private, no-cache``: browsers keep
+them per user but revalidate every time.
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
+from bps_internal_tools.metrics import record_cache
+from bps_internal_tools.services.auth import current_user
+from bps_internal_tools.services.cache import reference_version
+from bps_internal_tools.services.settings import get_data_version
+from bps_internal_tools.services.utils import get_version_info
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_for(*parts) -> str:
+    return hashlib.sha1("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:24]
+
+
+def conditional_get(extra=None):
+    """Decorator adding ETag / 304 handling to a view's GET requests.
+
+    Args:
+        extra: Optional callable taking the view's keyword arguments and
+            returning more values the response depends on (e.g. a roster
+            refresh time).  It runs before the ETag check.
+    """
+    def deco(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            # Pending flash messages would be swallowed by a 304
+            if request.method not in ("GET", "HEAD") or session.get("_flashes"):
+                return view(*args, **kwargs)
+            user = current_user() or {}
+            build = get_version_info()
+            parts = [
+                get_data_version(), reference_version(), build.get("version"), build.get("commit"),
+                user.get("username"), user.get("role"), request.full_path,
+            ]
+            if extra is not None:
+                parts.extend(extra(**kwargs))
+            tag = etag_for(*parts)
+            # Weak match: compressed responses carry the tag as W/"..."
+            hit = request.if_none_match.contains_weak(tag)
+            record_cache("http_etag", hit)
+            if hit:
+                resp = current_app.response_class(status=304)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(tag)
+            # A view may opt into longer caching, e.g. for version-stamped URLs
+            resp.headers.setdefault("Cache-Control", CACHE_CONTROL)
+            return resp
+        return wrapped
+    return deco
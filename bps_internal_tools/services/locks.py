@@ -0,0 +1,78 @@
+"""Cross-process locks held in the database.
+
+MariaDB/MySQL use ``GET_LOCK`` and PostgreSQL ``pg_try_advisory_lock`` on a
+dedicated connection; other backends (SQLite) fall back to a lease row in
+``sync_locks`` that expires if its holder dies.
+"""
+
+import os
+import socket
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from bps_internal_tools.models import SyncLock
+
+
+class LockBusy(Exception):
+    """Raised when a lock is already held by another process."""
+
+
+def lock_holder() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+@contextmanager
+def advisory_lock(engine: Engine, name: str, *, wait: int = 0, lease: timedelta = timedelta(hours=2)):
+    """Hold the database-wide lock *name* for the duration of the block.
+
+    Args:
+        engine: Engine for the database that arbitrates the lock.
+        name: Lock name shared by every process that must not overlap.
+        wait: Seconds to wait for the lock (MySQL only; others fail fast).
+        lease: How long a lease-row lock survives a crashed holder.
+
+    Raises:
+        LockBusy: If another process holds the lock.
+    """
+    dialect = engine.dialect.name
+    if dialect in ("mysql", "mariadb"):
+        with engine.connect() as conn:
+            got = conn.execute(text("SELECT GET_LOCK(:name, :wait)"), {"name": name, "wait": wait}).scalar()
+            if got != 1:
+                raise LockBusy(name)
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+        return
+
+    if dialect == "postgresql":
+        key = zlib.crc32(name.encode("utf-8"))
+        with engine.connect() as conn:
+            if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar():
+                raise LockBusy(name)
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+        return
+
+    holder = lock_holder()
+    now = datetime.utcnow()
+    try:
+        with engine.begin() as conn:
+            conn.execute(delete(SyncLock).where(SyncLock.name == name, SyncLock.expires_at < now))
+            conn.execute(insert(SyncLock).values(name=name, holder=holder, acquired_at=now, expires_at=now + lease))
+    except IntegrityError as exc:
+        raise LockBusy(name) from exc
+    try:
+        yield
+    finally:
+        with engine.begin() as conn:
+            conn.execute(delete(SyncLock).where(SyncLock.name == name, SyncLock.holder == holder))
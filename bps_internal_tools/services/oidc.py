@@ -0,0 +1,159 @@
+"""Disk cache for Google's OpenID discovery document and signing keys.
+
+Without it every gunicorn worker fetches the discovery document and JWKS on
+its first Google sign-in after a restart.  Here both are stored as JSON under
+``OIDC_CACHE_DIR`` and shared by all workers:
+
+* a fresh entry is served straight from disk (memoised per process by mtime),
+* an entry past its refresh point is still served while one worker, holding
+  a file lock, refreshes it in a background thread,
+* a missing entry is fetched synchronously under the same lock, so only one
+  worker goes to Google and the rest read its result.
+
+Entries live for ``OIDC_CACHE_TTL_SECONDS`` or the response's
+``Cache-Control: max-age``, whichever is shorter.  If Google can't be reached
+an expired entry keeps being served.  Authlib still re-fetches the JWKS by
+itself when a token is signed with an unknown key, and keeps that copy.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from flask import current_app
+
+from bps_internal_tools.metrics import external_call
+
+log = logging.getLogger(__name__)
+
+GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+# Start refreshing once this share of an entry's lifetime has passed
+REFRESH_AT = 0.8
+
+_memo: dict = {}
+_refreshing: set = set()
+_memo_lock = threading.Lock()
+
+
+def _path(cache_dir: str, url: str) -> str:
+    return os.path.join(cache_dir, hashlib.sha256(url.encode()).hexdigest()[:16] + ".json")
+
+
+@contextmanager
+def _file_lock(path: str, *, blocking: bool):
+    with open(f"{path}.lock", "w") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _read(path: str):
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+    with _memo_lock:
+        hit = _memo.get(path)
+        if hit and hit[0] == mtime:
+            return hit[1]
+    try:
+        with open(path, encoding="utf-8") as fh:
+            entry = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    with _memo_lock:
+        _memo[path] = (mtime, entry)
+    return entry
+
+
+def _max_age(resp) -> int | None:
+    m = re.search(r"max-age=(\d+)", resp.headers.get("Cache-Control", ""))
+    return int(m.group(1)) if m else None
+
+
+def _fetch(path: str, url: str, ttl: int, operation: str) -> dict:
+    with external_call("google_oauth", operation):
+        resp = requests.get(url, timeout=10)
+    resp.raise_for_status()
+    max_age = _max_age(resp)
+    lifetime = min(ttl, max_age) if max_age else ttl
+    now = time.time()
+    entry = {"url": url, "fetched_at": now, "expires_at": now + lifetime, "data": resp.json()}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(entry, fh)
+    os.replace(tmp, path)
+    return entry
+
+
+def _refresh_in_background(path: str, url: str, ttl: int, operation: str) -> None:
+    with _memo_lock:
+        if path in _refreshing:
+            return
+        _refreshing.add(path)
+
+    def run():
+        try:
+            with _file_lock(path, blocking=False) as locked:
+                entry = _read(path)
+                # Another worker may have refreshed it while we were deciding
+                if locked and (entry is None or _needs_refresh(entry)):
+                    _fetch(path, url, ttl, operation)
+        except Exception as exc:
+            log.warning("Background refresh of %s failed; serving cached copy: %s", url, exc)
+        finally:
+            with _memo_lock:
+                _refreshing.discard(path)
+
+    threading.Thread(target=run, name="oidc-refresh", daemon=True).start()
+
+
+def _needs_refresh(entry: dict) -> bool:
+    fetched, expires = entry["fetched_at"], entry["expires_at"]
+    return time.time() >= fetched + (expires - fetched) * REFRESH_AT
+
+
+def cached_json(url: str, *, cache_dir: str, ttl: int, operation: str = "discovery") -> dict:
+    """Return the JSON document at *url* through the shared disk cache."""
+    path = _path(cache_dir, url)
+    entry = _read(path)
+    if entry is None:
+        os.makedirs(cache_dir, exist_ok=True)
+        with _file_lock(path, blocking=True):
+            entry = _read(path) or _fetch(path, url, ttl, operation)
+    elif _needs_refresh(entry):
+        _refresh_in_background(path, url, ttl, operation)
+    return entry["data"]
+
+
+def google_oidc_documents() -> tuple[dict, dict]:
+    """Google's discovery document and its JWKS, from the shared cache.
+
+    Each is the same object for as long as its cache file is unchanged, so
+    callers can tell a refreshed copy by identity.
+
+    Raises:
+        requests.RequestException: If nothing is cached and Google can't be reached.
+    """
+    cfg = current_app.config
+    cache_dir = cfg.get("OIDC_CACHE_DIR", "env/oidc_cache")
+    ttl = cfg.get("OIDC_CACHE_TTL_SECONDS", 86400)
+    discovery = cached_json(
+        cfg.get("GOOGLE_DISCOVERY_URL", GOOGLE_DISCOVERY_URL), cache_dir=cache_dir, ttl=ttl, operation="discovery"
+    )
+    jwks = cached_json(discovery["jwks_uri"], cache_dir=cache_dir, ttl=ttl, operation="jwks")
+    return discovery, jwks
@@ -0,0 +1,151 @@
+"""Password hashing and verification off the request thread.
+
+PBKDF2 is deliberately slow, and a burst of logins hashing on the request
+threads leaves none free for other pages.  Here the work runs in a small
+per-worker process pool (``PASSWORD_HASH_WORKERS``; 0 hashes inline) at a
+lower CPU priority than the web workers, and at most
+``PASSWORD_HASH_MAX_CONCURRENCY`` hashes per worker run at once.  A login that
+can't get a slot within ``PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS``, or whose hash
+takes longer than ``PASSWORD_HASH_TIMEOUT_SECONDS``, gets
+:class:`PasswordHashBusy` and the login page asks the user to retry, so a
+burst of logins can only hold a few request threads and briefly.
+
+Stored hashes weaker than a fresh ``PASSWORD_HASH_METHOD`` hash are replaced on
+the next successful login (see :func:`needs_rehash`).
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Werkzeug picks the iteration count, so the cost follows Werkzeug upgrades
+DEFAULT_METHOD = "pbkdf2:sha256"
+
+_lock = threading.Lock()
+_state = {"pool": None, "pid": None, "slots": None}
+# Method setting -> prefix of a hash Werkzeug makes with it
+_prefixes: dict[str, str] = {}
+
+
+class PasswordHashBusy(RuntimeError):
+    """No hashing capacity within the configured timeout."""
+
+
+def hash_method() -> str:
+    return current_app.config.get("PASSWORD_HASH_METHOD", DEFAULT_METHOD)
+
+
+def _resources():
+    cfg = current_app.config
+    with _lock:
+        # A forked gunicorn worker must not reuse its parent's pool
+        if _state["pid"] != os.getpid():
+            workers = cfg.get("PASSWORD_HASH_WORKERS", 2)
+            _state["pool"] = ProcessPoolExecutor(
+                max_workers=workers,
+                # spawn: children start clean instead of copying a threaded worker
+                mp_context=multiprocessing.get_context("spawn"),
+                # Page requests get the CPU first
+                initializer=os.nice,
+                initargs=(10,),
+            ) if workers > 0 else None
+            _state["slots"] = threading.BoundedSemaphore(cfg.get("PASSWORD_HASH_MAX_CONCURRENCY", 2))
+            _state["pid"] = os.getpid()
+        return _state["pool"], _state["slots"]
+
+
+def _drop_pool() -> None:
+    # E.g. the children can't re-import __main__; hashing inline beats
+    # failing every login
+    current_app.logger.warning("Password hashing pool failed; hashing inline in this worker", exc_info=True)
+    with _lock:
+        _state["pool"] = None
+
+
+def _run(fn, *args):
+    pool, slots = _resources()
+    cfg = current_app.config
+    queue_timeout = cfg.get("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", 0.5)
+    if not slots.acquire(timeout=queue_timeout):
+        raise PasswordHashBusy("Too many password checks in progress")
+    if pool is not None:
+        try:
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            _drop_pool()
+        else:
+            # A timed-out hash keeps running in the pool, so its slot is only
+            # freed once it really finishes
+            future.add_done_callback(lambda _f: slots.release())
+            try:
+                return future.result(timeout=cfg.get("PASSWORD_HASH_TIMEOUT_SECONDS", 5))
+            except FutureTimeout:
+                raise PasswordHashBusy("Password check timed out") from None
+            except BrokenProcessPool:
+                _drop_pool()
+            # The failed future gave its slot back; take one for the inline hash
+            if not slots.acquire(timeout=queue_timeout):
+                raise PasswordHashBusy("Too many password checks in progress")
+    try:
+        return fn(*args)
+    finally:
+        slots.release()
+
+
+def verify_password(pwhash: str, password: str) -> bool:
+    """``check_password_hash`` in the pool.
+
+    Raises:
+        PasswordHashBusy: If no capacity frees up in time.
+    """
+    if not pwhash or not password:
+        return False
+    return _run(check_password_hash, pwhash, password)
+
+
+def hash_password(password: str) -> str:
+    """``generate_password_hash`` with ``PASSWORD_HASH_METHOD`` in the pool.
+
+    Raises:
+        PasswordHashBusy: If no capacity frees up in time.
+    """
+    return _run(generate_password_hash, password, hash_method())
+
+
+def _cost(prefix: str) -> tuple[tuple[str, ...], tuple[int, ...]]:
+    """Split a hash prefix like ``pbkdf2:sha256:1000000`` into names and numbers."""
+    parts = prefix.split(":")
+    return tuple(p for p in parts if not p.isdigit()), tuple(int(p) for p in parts if p.isdigit())
+
+
+def _configured_prefix() -> str:
+    method = hash_method()
+    prefix = _prefixes.get(method)
+    if prefix is None:
+        # The setting can leave parameters to Werkzeug (``pbkdf2:sha256``,
+        # ``scrypt``), so ask Werkzeug what it writes; once per worker
+        prefix = _run(generate_password_hash, "", method).split("$", 1)[0]
+        _prefixes[method] = prefix
+    return prefix
+
+
+def needs_rehash(pwhash: str) -> bool:
+    """Whether *pwhash* is weaker than a fresh ``PASSWORD_HASH_METHOD`` hash.
+
+    Another algorithm counts as weaker; the same algorithm only when its cost
+    parameters are lower, so hashes made with a higher cost are kept.
+    """
+    if not pwhash:
+        return False
+    try:
+        names, costs = _cost(_configured_prefix())
+    except PasswordHashBusy:
+        # Retried on the next login
+        return False
+    stored_names, stored_costs = _cost(pwhash.split("$", 1)[0])
+    return stored_names != names or stored_costs < costs
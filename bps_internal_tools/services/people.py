@@ -0,0 +1,116 @@
+"""Upkeep of ``users_canvas`` email lookups and Google account links.
+
+``email_normalized`` (lower-cased, trimmed ``email``) carries a unique index.
+:func:`sync_email_index` keeps it in step with ``email``; when two people
+share an address an active person wins over a suspended one, then whoever
+already holds it, then the lowest ``user_id``; the others are left unindexed.
+
+:func:`link_canvas_accounts` then points every Google sign-in at the Canvas
+person with that address in one UPDATE.  Both run at the end of every data
+import (see :func:`bps_internal_tools.services.sync.data_import_run`), so
+links follow email changes without touching the login path.
+"""
+
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from bps_internal_tools.models import People, User, normalize_email
+
+log = logging.getLogger(__name__)
+
+
+def sync_email_index(session: Session, user_ids: Optional[Iterable[str]] = None) -> int:
+    """Bring ``email_normalized`` in line with ``email``; the caller commits.
+
+    With *user_ids* only those people and whoever holds one of their
+    addresses are looked at, instead of the whole table.  Someone left
+    unindexed by an earlier clash is then only picked up by the next full
+    pass, which every import runs.
+
+    Returns:
+        Number of rows changed.
+    """
+    session.flush()
+    stmt = select(People.user_id, People.email, People.email_normalized, People.status)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        addresses = {
+            address
+            for email, norm in session.execute(
+                select(People.email, People.email_normalized).where(People.user_id.in_(user_ids))
+            )
+            for address in (normalize_email(email), norm)
+            if address
+        }
+        scope = People.user_id.in_(user_ids)
+        if addresses:
+            scope = or_(scope, People.email_normalized.in_(addresses))
+        stmt = stmt.where(scope)
+    rows = session.execute(stmt).all()
+
+    wanted = {uid: normalize_email(email) for uid, email, _, _ in rows}
+    current = {uid: norm for uid, _, norm, _ in rows}
+    claim_order = sorted(
+        rows, key=lambda r: (r.status != "active", current[r.user_id] != wanted[r.user_id], r.user_id)
+    )
+    owner, target = {}, {}
+    for uid, *_ in claim_order:
+        email = wanted[uid]
+        if email and owner.setdefault(email, uid) != uid:
+            log.warning("Email %s of %s already belongs to %s; not indexed", email, uid, owner[email])
+            email = None
+        target[uid] = email
+
+    changed = [uid for uid in target if target[uid] != current[uid]]
+    if not changed:
+        return 0
+    stmt = (
+        update(People.__table__)
+        .where(People.__table__.c.user_id == bindparam("uid"))
+        .values(email_normalized=bindparam("norm"))
+    )
+    # Clear first so an address moving between people never collides
+    cleared = [{"uid": uid, "norm": None} for uid in changed if current[uid]]
+    if cleared:
+        session.execute(stmt, cleared)
+    assigned = [{"uid": uid, "norm": target[uid]} for uid in changed if target[uid]]
+    if assigned:
+        session.execute(stmt, assigned)
+    return len(changed)
+
+
+def link_canvas_accounts(session: Session) -> dict:
+    """Link Google users to the Canvas person with their email; the caller commits.
+
+    Links that no longer match (the address moved or was removed) are
+    cleared.
+
+    Returns:
+        ``linked``: rows changed, ``unlinked``: Google users with no Canvas
+        match, ``conflicts``: people whose address is shared and so unindexed.
+    """
+    match = select(People.user_id).where(People.email_normalized == User.username).scalar_subquery()
+    linked = session.execute(
+        update(User)
+        .where(User.auth_provider == "google", User.canvas_user_id.is_distinct_from(match))
+        .values(canvas_user_id=match)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    unlinked = session.execute(
+        select(func.count()).select_from(User)
+        .where(User.auth_provider == "google", User.canvas_user_id.is_(None))
+    ).scalar_one()
+    conflicts = session.execute(
+        select(func.count()).select_from(People)
+        .where(People.email_normalized.is_(None), func.trim(People.email) != "")
+    ).scalar_one()
+    return {"linked": linked, "unlinked": unlinked, "conflicts": conflicts}
+
+
+def refresh_account_links(session: Session, user_ids: Optional[Iterable[str]] = None) -> dict:
+    """:func:`sync_email_index` (limited to *user_ids* if given) then :func:`link_canvas_accounts`."""
+    sync_email_index(session, user_ids)
+    return link_canvas_accounts(session)
@@ -1,30 +1,61 @@
-from sqlalchemy import select, func
+import threading
+import unicodedata
+
+from sqlalchemy import bindparam, select, func
 from bps_internal_tools.models import Course, People, Enrollment, GradeSection
 from typing import List, Dict, Optional
 from bps_internal_tools.extensions import db 
+from bps_internal_tools.services.cache import cached
+from bps_internal_tools.services.replica import read_bind_arguments
+from bps_internal_tools.services.settings import get_data_version
 
 
 # Reusable predicate: real Canvas courses c + digits only (e.g., c003936)
 _COURSE_ID_REGEX = r'^c[0-9]+$'
 
-def search_teacher_by_name(query):
-    q = f"%{query.lower()}%"
-    s = db.session
-    rows = s.execute(
+def normalize_name(name: str) -> str:
+    """Search key for a person's name: accents stripped, lowercased, single spaces.
+
+    ``static/app.js`` normalizes typed queries the same way.
+    """
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).lower().split())
+
+def name_matches(key: str, query: str) -> bool:
+    """True if every word of *query* appears in the normalized *key*."""
+    return all(term in key for term in normalize_name(query).split())
+
+_directory_lock = threading.Lock()
+_teacher_directory = {"version": None, "teachers": []}
+
+def _load_teacher_directory() -> List[Dict]:
+    # Read from the primary so the rows match the data version they're stored under
+    rows = db.session.execute(
         select(People.user_id, People.full_name)
         .join(Enrollment, Enrollment.user_id == People.user_id)
         .where(Enrollment.role == "teacher")
         .where(Enrollment.course_id.like("c%"))
-        .where(People.full_name.ilike(q))
         .where(People.status == 'active')
+        .distinct()
+        .order_by(People.full_name)
     ).all()
-    # DISTINCT-like (SQLA 2.0 distinct over tuple is possible; or dedupe in Python)
-    seen, out = set(), []
-    for uid, name in rows:
-        if uid not in seen:
-            out.append({"user_id": uid, "full_name": name})
-            seen.add(uid)
-    return out
+    return [
+        {"user_id": uid, "full_name": name or "", "key": normalize_name(name)} for uid, name in rows
+    ]
+
+def get_teacher_directory() -> List[Dict]:
+    """Active Canvas teachers, reloaded when an import bumps the data version."""
+    version = get_data_version()
+    with _directory_lock:
+        if _teacher_directory["version"] == version:
+            return _teacher_directory["teachers"]
+    teachers = _load_teacher_directory()
+    with _directory_lock:
+        _teacher_directory.update(version=version, teachers=teachers)
+    return teachers
+
+def search_teacher_by_name(query):
+    return [dict(t) for t in get_teacher_directory() if name_matches(t["key"], query)]
 
 def get_courses_for_user(user_id: str, role: str | None = None, terms: list[str] | None = None):
     s = db.session
@@ -41,54 +72,79 @@ def get_courses_for_user(user_id: str, role: str | None = None, terms: list[str]
     if terms:
         stmt = stmt.where(Course.term_id.in_(terms))
 
-    rows = s.execute(stmt.distinct().order_by(order_key, Course.course_id)).all()
+    rows = s.execute(
+        stmt.distinct().order_by(order_key, Course.course_id),
+        bind_arguments=read_bind_arguments(),
+    ).all()
 
     return [
         {"course_id": cid, "short_name": sname, "long_name": lname}
         for (cid, sname, lname) in rows
     ]
 
-def get_person(user_id: str) -> Optional[Dict]:
+class PersonRecord:
+    """A ``user_id``/``full_name`` pair; reads as attributes or ``rec["key"]``."""
+
+    __slots__ = ("user_id", "full_name")
+
+    def __init__(self, user_id, full_name):
+        self.user_id = user_id
+        self.full_name = full_name
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return f"PersonRecord({self.user_id!r}, {self.full_name!r})"
+
+# Hot lookups are built once with bound parameters: SQLAlchemy then reuses
+# their compiled form instead of constructing and compiling a select per call
+_PERSON_STMT = select(People.user_id, People.full_name).where(People.user_id == bindparam("user_id"))
+
+_PEOPLE_BY_ENROLLMENT = select(People.user_id, People.full_name).join(
+    Enrollment, Enrollment.user_id == People.user_id
+)
+_ACTIVE_STUDENTS = (
+    _PEOPLE_BY_ENROLLMENT.where(Enrollment.role == "student").where(People.status == "active")
+)
+_COURSE_STUDENTS_STMT = (
+    _ACTIVE_STUDENTS.where(Enrollment.course_id == bindparam("ref_id")).order_by(People.full_name)
+)
+_SECTION_STUDENTS_STMT = (
+    _ACTIVE_STUDENTS.where(Enrollment.section_id == bindparam("ref_id")).order_by(People.full_name)
+)
+_COURSE_TEACHERS_STMT = (
+    _PEOPLE_BY_ENROLLMENT.where(Enrollment.course_id == bindparam("course_id"))
+    .where(Enrollment.role == "teacher")
+    .order_by(People.full_name)
+)
+_COURSE_INFO_STMT = select(Course.short_name, Course.long_name).where(
+    Course.course_id == bindparam("course_id")
+)
+
+def _people(stmt, params) -> List[PersonRecord]:
+    rows = db.session.execute(stmt, params, bind_arguments=read_bind_arguments())
+    return [PersonRecord(uid, name) for uid, name in rows]
+
+def get_person(user_id: str) -> Optional[PersonRecord]:
     """Return the People row (user_id + full_name) for a given user id."""
-    s = db.session
-    row = s.execute(
-        select(People.user_id, People.full_name).where(People.user_id == user_id)
+    row = db.session.execute(
+        _PERSON_STMT, {"user_id": user_id}, bind_arguments=read_bind_arguments()
     ).first()
-    if not row:
-        return None
-    uid, name = row
-    return {"user_id": uid, "full_name": name}
+    return PersonRecord(*row) if row else None
 
-def get_students_in_course(course_id: str) -> List[Dict]:
+def get_students_in_course(course_id: str) -> List[PersonRecord]:
     """
     Return active students (Canvas users) in a given course_id (user_id + full_name).
     """
-    s = db.session
-    stmt = (
-        select(People.user_id, People.full_name)
-        .join(Enrollment, Enrollment.user_id == People.user_id)
-        .where(Enrollment.course_id == course_id)
-        .where(Enrollment.role == 'student')
-        .where(People.status == 'active')
-        .order_by(People.full_name)
-    )
-    rows = s.execute(stmt).all()
-
-    return [{"user_id": uid, "full_name": full} for (uid, full) in rows]
+    return _people(_COURSE_STUDENTS_STMT, {"ref_id": course_id})
 
-def get_teachers_in_course(course_id: str) -> List[Dict]:
+def get_teachers_in_course(course_id: str) -> List[PersonRecord]:
     """Return teachers (Canvas users) in a given course."""
-    s = db.session
-    stmt = (
-        select(People.user_id, People.full_name)
-        .join(Enrollment, Enrollment.user_id == People.user_id)
-        .where(Enrollment.course_id == course_id)
-        .where(Enrollment.role == "teacher")
-        .order_by(People.full_name)
-    )
-    rows = s.execute(stmt).all()
-
-    return [{"user_id": uid, "full_name": full} for (uid, full) in rows]
+    return _people(_COURSE_TEACHERS_STMT, {"course_id": course_id})
 
 
 def get_course_info(course_id: str) -> Dict:
@@ -96,10 +152,8 @@ def get_course_info(course_id: str) -> Dict:
     Return {'short_name': ..., 'long_name': ...} for a course_id,
     or sensible fallbacks if not found.
     """
-    s = db.session
-    row = s.execute(
-        select(Course.short_name, Course.long_name)
-        .where(Course.course_id == course_id)
+    row = db.session.execute(
+        _COURSE_INFO_STMT, {"course_id": course_id}, bind_arguments=read_bind_arguments()
     ).first()
 
     if not row:
@@ -107,59 +161,47 @@ def get_course_info(course_id: str) -> Dict:
     short, long_ = row
     return {"short_name": short or "", "long_name": long_ or (short or "Unknown Course")}
 
-def get_grade_sections() -> List[Dict]:
-    """Return all grade sections."""
+def _load_grade_sections() -> List[Dict]:
+    # Reference data: read from the primary, it's cached for every worker anyway
     s = db.session
     rows = s.execute(
-        select(GradeSection.id, GradeSection.display_name)
-        .order_by(GradeSection.display_name)
-    ).all()
-    return [{"id": gid, "display_name": name} for gid, name in rows]
-
-def get_grade_section(section_id: int) -> Optional[Dict]:
-    """Return a grade section by id."""
-    s = db.session
-    row = s.execute(
         select(
             GradeSection.id,
             GradeSection.display_name,
             GradeSection.school_level,
             GradeSection.reference_course_id,
             GradeSection.reference_is_section,
-        ).where(GradeSection.id == section_id)
-    ).first()
-    if not row:
-        return None
-    gid, name, level, course_id, is_section = row
-    return {
-        "id": gid,
-        "display_name": name,
-        "school_level": level,
-        "reference_course_id": course_id,
-        "reference_is_section": is_section,
-    }
-
-def get_students_in_grade_section(section_id: int) -> List[Dict]:
+        ).order_by(GradeSection.display_name)
+    ).all()
+    return [
+        {
+            "id": gid,
+            "display_name": name,
+            "school_level": level,
+            "reference_course_id": course_id,
+            "reference_is_section": is_section,
+        }
+        for gid, name, level, course_id, is_section in rows
+    ]
+
+def get_grade_sections() -> List[Dict]:
+    """Return all grade sections."""
+    return [
+        {"id": gs["id"], "display_name": gs["display_name"]}
+        for gs in cached("grade_sections", _load_grade_sections)
+    ]
+
+def get_grade_section(section_id: int) -> Optional[Dict]:
+    """Return a grade section by id."""
+    for gs in cached("grade_sections", _load_grade_sections):
+        if gs["id"] == section_id:
+            return dict(gs)
+    return None
+
+def get_students_in_grade_section(section_id: int) -> List[PersonRecord]:
     """Return active students for a given grade section."""
     info = get_grade_section(section_id)
     if not info or not info["reference_course_id"]:
         return []
-    ref_id = info["reference_course_id"]
-    s = db.session
-    stmt = select(People.user_id, People.full_name).join(
-        Enrollment, Enrollment.user_id == People.user_id
-    )
-    if info.get("reference_is_section"):
-        stmt = stmt.where(Enrollment.section_id == ref_id)
-    else:
-        stmt = stmt.where(Enrollment.course_id == ref_id)
-    stmt = (
-        stmt.where(Enrollment.role == 'student')
-        .where(People.status == 'active')
-        .order_by(People.full_name)
-    )
-    rows = s.execute(stmt).all()
-    return [{"user_id": uid, "full_name": full} for (uid, full) in rows]
-
-
-
+    stmt = _SECTION_STUDENTS_STMT if info.get("reference_is_section") else _COURSE_STUDENTS_STMT
+    return _people(stmt, {"ref_id": info["reference_course_id"]})
@@ -0,0 +1,88 @@
+"""Route read-only lookups to an optional read replica.
+
+Configure ``REPLICA_DATABASE_URL`` to register a ``replica`` bind.  Query
+helpers pass :func:`read_bind_arguments` to ``session.execute`` and land on
+the replica unless one of these guards sends them to the primary:
+
+* the current request already wrote through the session (read-after-write),
+* the browser session wrote within the last ``REPLICA_STICKY_SECONDS``
+  (so the redirect after a POST sees its own changes), or
+* the replica's ``data_version`` stamp differs from the primary's, i.e. it
+  hasn't caught up with the last import yet.  This is re-checked at most
+  every ``REPLICA_CHECK_SECONDS`` per process.
+"""
+
+import threading
+import time
+
+from flask import current_app, has_request_context, session
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from bps_internal_tools.extensions import db
+from bps_internal_tools.models import AppSetting
+from bps_internal_tools.services.settings import DATA_VERSION_KEY
+
+REPLICA_BIND = "replica"
+_STICKY_SESSION_KEY = "_primary_until"
+
+_lock = threading.Lock()
+_state = {"checked_at": None, "fresh": False}
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_write(sess, _flush_context):
+    sess.info["wrote"] = True
+
+
+def _replica_engine():
+    if REPLICA_BIND not in (current_app.config.get("SQLALCHEMY_BINDS") or {}):
+        return None
+    return db.engines[REPLICA_BIND]
+
+
+def _data_version(engine):
+    with engine.connect() as conn:
+        return conn.execute(
+            select(AppSetting.value).where(AppSetting.key == DATA_VERSION_KEY)
+        ).scalar_one_or_none()
+
+
+def replica_is_fresh(engine) -> bool:
+    """Whether the replica has caught up with the primary's last data import."""
+    interval = current_app.config.get("REPLICA_CHECK_SECONDS", 5)
+    now = time.monotonic()
+    with _lock:
+        if _state["checked_at"] is not None and now - _state["checked_at"] < interval:
+            return _state["fresh"]
+    try:
+        fresh = _data_version(engine) == _data_version(db.engine)
+    except Exception:
+        current_app.logger.warning("Replica health check failed; reading from primary", exc_info=True)
+        fresh = False
+    with _lock:
+        _state.update(checked_at=now, fresh=fresh)
+    return fresh
+
+
+def read_bind_arguments() -> dict:
+    """``bind_arguments`` for a read that may be served by the replica."""
+    engine = _replica_engine()
+    if engine is None:
+        return {}
+    if db.session.info.get("wrote"):
+        return {}
+    if has_request_context() and session.get(_STICKY_SESSION_KEY, 0) > time.time():
+        return {}
+    if not replica_is_fresh(engine):
+        return {}
+    return {"bind": engine}
+
+
+def init_app(app) -> None:
+    @app.after_request
+    def _stick_to_primary_after_write(resp):
+        # scoped session is per app context, so this only sees this request's flushes
+        if db.session.info.get("wrote"):
+            session[_STICKY_SESSION_KEY] = time.time() + app.config.get("REPLICA_STICKY_SECONDS", 10)
+        return resp
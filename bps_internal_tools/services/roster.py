@@ -0,0 +1,107 @@
+"""Keep individual course rosters fresh between full Canvas imports."""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+import requests
+from flask import current_app
+from sqlalchemy import delete, select
+
+from bps_internal_tools.extensions import db
+from bps_internal_tools.metrics import record_roster_skipped
+from bps_internal_tools.models import CourseRosterRefresh, Enrollment, People
+from bps_internal_tools.services.canvas import CanvasAPIError, get_course_enrollments
+from bps_internal_tools.services.settings import CANVAS_IMPORT_SETTING_KEY, bump_data_version, get_setting
+from bps_internal_tools.services.teacher_courses import rebuild_teacher_courses
+
+# Enrollment columns a roster refresh writes, used to tell whether it changed anything
+_ROSTER_COLUMNS = ("user_id", "role", "role_id", "section_id", "status", "limit_section_privileges")
+
+
+def _canvas_configured() -> bool:
+    cfg = current_app.config
+    return bool(cfg.get("CANVAS_API_URL") and cfg.get("CANVAS_API_TOKEN"))
+
+
+def roster_refreshed_at(course_id: str) -> Optional[datetime]:
+    """Return when *course_id*'s roster was last loaded (per-course refresh or full import)."""
+    row = db.session.get(CourseRosterRefresh, course_id)
+    stamps = [row.refreshed_at] if row else []
+    imported = get_setting(CANVAS_IMPORT_SETTING_KEY)
+    if imported:
+        try:
+            stamps.append(datetime.fromisoformat(imported))
+        except ValueError:
+            pass
+    return max(stamps) if stamps else None
+
+
+def refresh_course_roster(course_id: str) -> int:
+    """Replace *course_id*'s enrollments with the live Canvas roster.
+
+    Only enrollments for users already known in ``users_canvas`` are stored;
+    the others are logged and counted until the next full import adds them.
+    A changed roster bumps the data version in the same transaction, so the
+    teacher directory and cached pages built from enrollments are refreshed.
+
+    Returns:
+        The number of enrollment rows written.
+
+    Raises:
+        CanvasAPIError: If Canvas responds with an error.
+    """
+    cfg = current_app.config
+    rows = get_course_enrollments(
+        course_id,
+        base_url=cfg["CANVAS_API_URL"].rstrip("/"),
+        token=cfg["CANVAS_API_TOKEN"],
+    )
+    s = db.session
+    user_ids = {r["user_id"] for r in rows}
+    known = set(
+        s.execute(select(People.user_id).where(People.user_id.in_(user_ids))).scalars()
+    ) if user_ids else set()
+    skipped = sorted(user_ids - known)
+    if skipped:
+        current_app.logger.warning(
+            "Roster refresh for %s skipped %d user(s) not yet imported: %s",
+            course_id, len(skipped), ", ".join(skipped[:20]),
+        )
+        record_roster_skipped(len(skipped))
+    rows = [r for r in rows if r["user_id"] in known]
+
+    columns = [getattr(Enrollment, c) for c in _ROSTER_COLUMNS]
+    before = set(s.execute(select(*columns).where(Enrollment.course_id == course_id)).tuples())
+    after = {tuple(r.get(c) for c in _ROSTER_COLUMNS) for r in rows}
+    if before != after:
+        s.execute(delete(Enrollment).where(Enrollment.course_id == course_id))
+        if rows:
+            s.execute(Enrollment.__table__.insert(), rows)
+        rebuild_teacher_courses(s, [course_id])
+        bump_data_version(s)
+    s.merge(CourseRosterRefresh(course_id=course_id, refreshed_at=datetime.utcnow()))
+    s.commit()
+    return len(rows)
+
+
+def ensure_fresh_roster(course_id: str) -> bool:
+    """Refresh *course_id* from Canvas if its roster is older than ``ROSTER_TTL_SECONDS``.
+
+    Failures are logged and the cached roster is used as-is.
+
+    Returns:
+        True if the roster was refreshed.
+    """
+    ttl = current_app.config.get("ROSTER_TTL_SECONDS", 0)
+    if not ttl or not _canvas_configured():
+        return False
+    refreshed = roster_refreshed_at(course_id)
+    if refreshed and datetime.utcnow() - refreshed < timedelta(seconds=ttl):
+        return False
+    try:
+        refresh_course_roster(course_id)
+    except (CanvasAPIError, requests.RequestException) as exc:
+        db.session.rollback()
+        current_app.logger.warning("Roster refresh for %s failed: %s", course_id, exc)
+        return False
+    return True
@@ -5,22 +5,38 @@ from typing import List, Optional
 
 import pytz
 
+from bps_internal_tools.config import DEFAULT_TERMS
 from bps_internal_tools.extensions import db
 from bps_internal_tools.models import AppSetting
+from bps_internal_tools.services.cache import bump_reference_version, cached
 
 DEFAULT_TIMEZONE = "America/Vancouver"
 _TIMEZONE_SETTING_KEY = "system_timezone"
+# When the last full Canvas import finished (ISO timestamp, UTC)
+CANVAS_IMPORT_SETTING_KEY = "canvas_last_import_at"
+# Bumped whenever imported Canvas/SIS data changes; caches key off it
+DATA_VERSION_KEY = "data_version"
+# Comma separated Canvas term ids offered in the TOC course picker
+ACTIVE_TERMS_KEY = "active_terms"
+# Written outside set_setting (importers, scripts), so never served from cache
+_UNCACHED_KEYS = {CANVAS_IMPORT_SETTING_KEY, DATA_VERSION_KEY}
 
 
 def _get_setting_row(key: str) -> Optional[AppSetting]:
     return db.session.get(AppSetting, key)
 
 
-def get_setting(key: str, default: Optional[str] = None) -> Optional[str]:
+def _load_setting(key: str) -> Optional[str]:
     row = _get_setting_row(key)
-    if row is None or row.value is None:
-        return default
-    return row.value
+    return None if row is None else row.value
+
+
+def get_setting(key: str, default: Optional[str] = None) -> Optional[str]:
+    if key in _UNCACHED_KEYS:
+        value = _load_setting(key)
+    else:
+        value = cached(f"setting:{key}", lambda: _load_setting(key))
+    return default if value is None else value
 
 
 def set_setting(key: str, value: Optional[str]) -> None:
@@ -33,9 +49,40 @@ def set_setting(key: str, value: Optional[str]) -> None:
     else:
         row.value = value
         row.updated_at = now
+    bump_reference_version(session)
     session.commit()
 
 
+def get_data_version() -> str:
+    return get_setting(DATA_VERSION_KEY, "0") or "0"
+
+
+def bump_data_version(session=None) -> str:
+    """Stamp a new data version; the caller's *session* commits it.
+
+    Takes an explicit session so scripts running outside the app can use it.
+    """
+    session = session or db.session
+    now = datetime.utcnow()
+    version = now.strftime("%Y%m%d%H%M%S%f")
+    session.merge(AppSetting(key=DATA_VERSION_KEY, value=version, updated_at=now))
+    return version
+
+
+def parse_terms(value: Optional[str]) -> List[str]:
+    """Split a comma/whitespace separated term list, dropping blanks and repeats."""
+    terms = []
+    for term in (value or "").replace(",", " ").split():
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def get_active_terms() -> List[str]:
+    value = get_setting(ACTIVE_TERMS_KEY)
+    return list(DEFAULT_TERMS) if value is None else parse_terms(value)
+
+
 def get_system_timezone() -> str:
     value = get_setting(_TIMEZONE_SETTING_KEY, DEFAULT_TIMEZONE) or DEFAULT_TIMEZONE
     try:
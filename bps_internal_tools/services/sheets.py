@@ -1,25 +1,74 @@
 from datetime import datetime
+import logging
 import os
+import re
+import sys
+import threading
 
-import gspread
-from gspread_formatting import format_cell_range, CellFormat, TextFormat
-from google.oauth2.service_account import Credentials
+import requests
 
+from bps_internal_tools.metrics import external_call
+from bps_internal_tools.services.breaker import BreakerOpen, breaker
 from bps_internal_tools.services.settings import get_system_tzinfo
 
+# gspread, gspread_formatting and google-auth are imported on first use, and
+# the spreadsheet is opened on the first submission rather than at import
+# time, so booting a worker costs neither the imports nor a Sheets round trip.
+
+log = logging.getLogger(__name__)
+
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 SERVICE_ACCOUNT_FILE = os.getenv('GOOGLE_CREDENTIALS_PATH', "/home/alan/bps_internal_tools/env/splendid-sunset-436122-n9-2a123c008b07.json")
 GOOGLE_SHEET_ID = os.getenv('GOOGLE_SHEET_ID', "1MqP7hlhQIpsFv8o8Y4tefU2p8eDOlUjH3ooP7_40i_M")
 
-credentials = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-client = gspread.authorize(credentials)
-sheet = client.open_by_key(GOOGLE_SHEET_ID)
+_sheet = None
+_sheet_lock = threading.Lock()
+
+def get_sheet():
+    global _sheet
+    if _sheet is None:
+        with _sheet_lock:
+            if _sheet is None:
+                import gspread
+                from google.oauth2.service_account import Credentials
+
+                with external_call("sheets", "open"):
+                    credentials = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+                    client = gspread.authorize(credentials)
+                    _sheet = client.open_by_key(GOOGLE_SHEET_ID)
+    return _sheet
+
+def is_unavailable(exc):
+    """Whether *exc* means Sheets is down or overloaded, so retrying later can work.
+
+    Everything else (missing credentials, a bad sheet id, a bug) is permanent
+    and should be seen rather than retried.
+    """
+    if isinstance(exc, (BreakerOpen, requests.RequestException, ConnectionError, TimeoutError)):
+        return True
+    # Only loaded once a Sheets call has been made, so checking sys.modules
+    # avoids importing them here
+    auth_errors = sys.modules.get("google.auth.exceptions")
+    if auth_errors is not None and isinstance(exc, auth_errors.TransportError):
+        return True
+    gspread_errors = sys.modules.get("gspread.exceptions")
+    if gspread_errors is not None and isinstance(exc, gspread_errors.APIError):
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+        return status is not None and (status == 429 or status >= 500)
+    return False
 
 def _now_local():
     return datetime.now(get_system_tzinfo())
 
 def get_or_create_today_tab():
-    today_name = _now_local().strftime("%Y-%m-%d")
+    return get_or_create_day_tab(_now_local())
+
+def get_or_create_day_tab(day):
+    import gspread
+    from gspread_formatting import format_cell_range, CellFormat, TextFormat
+
+    sheet = get_sheet()
+    today_name = day.strftime("%Y-%m-%d")
     try:
         ws = sheet.worksheet(today_name)
     except gspread.exceptions.WorksheetNotFound:
@@ -75,22 +124,33 @@ def get_or_create_today_tab():
 
 
 def bold_row(worksheet, row_number):
+    from gspread_formatting import format_cell_range, CellFormat, TextFormat
+
     fmt = CellFormat(textFormat=TextFormat(bold=True))
     format_cell_range(worksheet, f'A{row_number}:F{row_number}', fmt)
 
-def log_attendance(absent_students, course_name, teachers, submitted_by):
-    ws = get_or_create_today_tab()
-    now = _now_local()
+def log_attendance(absent_students, course_name, teachers, submitted_by, submitted_at=None):
+    """Append a submission to the day's tab.
+
+    *submitted_at* (aware datetime) backdates a replayed submission; it
+    defaults to now.
+
+    Raises:
+        BreakerOpen: Without calling Sheets, while its circuit breaker is open.
+    """
+    # Only outages count against the breaker: a configuration error has to
+    # surface on every submission, not be hidden behind an open breaker
+    with breaker("sheets").guard(is_failure=is_unavailable), external_call("sheets", "log_attendance"):
+        _log_attendance(absent_students, course_name, teachers, submitted_by, submitted_at)
+
+def _log_attendance(absent_students, course_name, teachers, submitted_by, submitted_at=None):
+    now = submitted_at.astimezone(get_system_tzinfo()) if submitted_at else _now_local()
+    ws = get_or_create_day_tab(now)
     date_str = now.strftime("%Y-%m-%d")
     time_str = now.strftime("%H:%M")
 
-    rows = []
-    # Bold course line (we'll keep it for readability)
-    ws.append_row([course_name, "", "", "", "", ""], value_input_option="RAW")
-    # Make the last row bold:
-    last = len(ws.get_all_values())
-    format_cell_range(ws, f"A{last}:A{last}", CellFormat(textFormat=TextFormat(bold=True)))
-
+    # Course line first, then one row per absent student
+    rows = [[course_name, "", "", "", "", ""]]
     teachers_str = ", ".join(teachers) if teachers else ""
     if absent_students:
         for s in absent_students:
@@ -98,4 +158,19 @@ def log_attendance(absent_students, course_name, teachers, submitted_by):
     else:
         rows.append([date_str, time_str, "All Students Present", course_name, teachers_str, submitted_by])
 
-    ws.append_rows(rows, value_input_option="RAW")
\ No newline at end of file
+    # A single append either lands whole or not at all, so a failed
+    # submission can be queued and replayed without duplicating rows
+    result = ws.append_rows(rows, value_input_option="RAW")
+    _bold_course_line(ws, result)
+
+def _bold_course_line(ws, append_result):
+    """Bold the course line of an append; cosmetic, so failures are only logged."""
+    try:
+        from gspread_formatting import format_cell_range, CellFormat, TextFormat
+
+        # e.g. "'2026-10-19'!A12:F15"
+        updated = append_result["updates"]["updatedRange"]
+        first = int(re.match(r"[A-Z]+(\d+)", updated.rsplit("!", 1)[-1]).group(1))
+        format_cell_range(ws, f"A{first}:A{first}", CellFormat(textFormat=TextFormat(bold=True)))
+    except Exception:
+        log.warning("Could not bold the course line in %s", ws.title, exc_info=True)
@@ -0,0 +1,200 @@
+"""Run data imports one at a time and keep a history of them.
+
+Every job that rewrites imported data (the Canvas sync and SIS Sync uploads)
+goes through :func:`data_import_run`, which
+
+* holds the ``data_import`` database lock so imports never overlap, even
+  across gunicorn workers, the companion CLI and the importer script,
+* records the run and its timing in ``sync_runs``,
+* re-links Google sign-ins to Canvas people by email and rebuilds the
+  ``teacher_courses`` picker table on success, and
+* bumps the ``data_version`` stamp on success so caches can invalidate.
+
+The Canvas sync can also run on a schedule inside the app (see
+``CANVAS_SYNC_INTERVAL_MINUTES``) or via ``flask canvas-sync``.  The same
+scheduler replays TOC attendance queued during a Google Sheets outage every
+``ATTENDANCE_REPLAY_INTERVAL_SECONDS``, under the replay lock.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+import click
+from flask import current_app
+from sqlalchemy import select
+
+from bps_internal_tools.extensions import db
+from bps_internal_tools.models import SyncRun
+from bps_internal_tools.services.locks import LockBusy, advisory_lock, lock_holder
+from bps_internal_tools.services.people import refresh_account_links
+from bps_internal_tools.services.settings import bump_data_version
+from bps_internal_tools.services.teacher_courses import rebuild_teacher_courses
+from bps_internal_tools.tracing import span
+
+DATA_IMPORT_LOCK = "data_import"
+CANVAS_SYNC_JOB = "canvas_sync"
+
+_scheduler_started = False
+
+
+@contextmanager
+def data_import_run(session, job: str, *, trigger: str = "manual"):
+    """Run an import under the shared lock, recording it in ``sync_runs``.
+
+    Yields the :class:`SyncRun` row; set ``run.detail`` to keep a summary.
+
+    Raises:
+        LockBusy: If another import is already running.
+    """
+    with advisory_lock(session.get_bind(), DATA_IMPORT_LOCK), span(f"import.{job}", trigger=trigger):
+        run = SyncRun(job=job, trigger=trigger, status="running", started_at=datetime.utcnow(), host=lock_holder())
+        session.add(run)
+        session.commit()
+        started = time.perf_counter()
+        try:
+            yield run
+        except Exception as exc:
+            session.rollback()
+            run.status = "error"
+            run.detail = f"{type(exc).__name__}: {exc}"[:4000]
+            run.finished_at = datetime.utcnow()
+            run.duration_ms = int((time.perf_counter() - started) * 1000)
+            session.commit()
+            raise
+        links = refresh_account_links(session)
+        links["teacher_courses"] = rebuild_teacher_courses(session)
+        run.detail = ", ".join(filter(None, [run.detail, *(f"{k}={v}" for k, v in links.items())]))
+        run.status = "ok"
+        run.finished_at = datetime.utcnow()
+        run.duration_ms = int((time.perf_counter() - started) * 1000)
+        bump_data_version(session)
+        session.commit()
+
+
+def recent_runs(limit: int = 10):
+    return db.session.execute(
+        select(SyncRun).order_by(SyncRun.started_at.desc()).limit(limit)
+    ).scalars().all()
+
+
+def run_canvas_sync(trigger: str = "manual") -> SyncRun:
+    """Fetch a Canvas report and import it (needs an app context)."""
+    from bps_internal_tools.services.canvas_import import fetch_canvas_report, import_canvas_export
+
+    cfg = current_app.config
+    if not cfg.get("CANVAS_API_URL") or not cfg.get("CANVAS_API_TOKEN"):
+        raise RuntimeError("Canvas API not configured")
+
+    with data_import_run(db.session, CANVAS_SYNC_JOB, trigger=trigger) as run:
+        archive = fetch_canvas_report(
+            cfg["CANVAS_REPORT_DIR"],
+            base_url=cfg["CANVAS_API_URL"],
+            token=cfg["CANVAS_API_TOKEN"],
+            account_id=cfg.get("CANVAS_ACCOUNT_ID", "1"),
+            report=cfg["CANVAS_REPORT_TYPE"],
+            poll_interval=cfg["CANVAS_REPORT_POLL_SECONDS"],
+            timeout=cfg["CANVAS_REPORT_TIMEOUT_SECONDS"],
+        )
+        counts = import_canvas_export(db.session, archive_path=archive)
+        run.detail = ", ".join(f"{k}={v}" for k, v in counts.items())
+    return run
+
+
+def canvas_sync_due(interval: timedelta) -> bool:
+    last = db.session.execute(
+        select(SyncRun.started_at)
+        .where(SyncRun.job == CANVAS_SYNC_JOB)
+        .order_by(SyncRun.started_at.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+    return last is None or datetime.utcnow() - last >= interval
+
+
+def _replay_attendance(app) -> None:
+    from bps_internal_tools.services.attendance_queue import replay_pending
+
+    try:
+        result = replay_pending()
+        if result:
+            app.logger.info("Replayed queued attendance: %s sent, %s remaining", result["sent"], result["remaining"])
+    except Exception:
+        app.logger.exception("Scheduled attendance replay failed")
+
+
+def _scheduler_loop(app, interval: Optional[timedelta], replay_seconds: float) -> None:
+    periods = [p for p in (interval.total_seconds() if interval else 0, replay_seconds) if p > 0]
+    poll = min([60.0, *periods])
+    last_replay = time.monotonic()
+    while True:
+        time.sleep(poll)
+        with app.app_context():
+            try:
+                if interval and canvas_sync_due(interval):
+                    run = run_canvas_sync(trigger="schedule")
+                    app.logger.info("Scheduled Canvas sync finished in %sms (%s)", run.duration_ms, run.detail)
+            except LockBusy:
+                pass  # another worker or an upload is importing right now
+            except Exception:
+                app.logger.exception("Scheduled Canvas sync failed")
+            try:
+                if replay_seconds > 0 and time.monotonic() - last_replay >= replay_seconds:
+                    last_replay = time.monotonic()
+                    _replay_attendance(app)
+            finally:
+                db.session.remove()
+
+
+def _schedule(app):
+    """The Canvas sync interval (None if off) and attendance replay period."""
+    minutes = app.config.get("CANVAS_SYNC_INTERVAL_MINUTES", 0)
+    return (
+        timedelta(minutes=minutes) if minutes > 0 else None,
+        app.config.get("ATTENDANCE_REPLAY_INTERVAL_SECONDS", 0),
+    )
+
+
+def start_scheduler(app) -> bool:
+    """Start the in-process scheduler (Canvas sync, attendance replay) if configured.
+
+    Each worker runs its own scheduler thread; the database locks and the
+    "due" check make sure only one of them actually imports per interval or
+    replays at a time.
+    """
+    global _scheduler_started
+    interval, replay_seconds = _schedule(app)
+    if _scheduler_started or (interval is None and replay_seconds <= 0) or app.config.get("TESTING"):
+        return False
+    _scheduler_started = True
+    threading.Thread(
+        target=_scheduler_loop,
+        args=(app, interval, replay_seconds),
+        name="sync-scheduler",
+        daemon=True,
+    ).start()
+    return True
+
+
+def init_app(app) -> None:
+    @app.cli.command("canvas-sync")
+    @click.option("--loop", is_flag=True, help="Keep running on CANVAS_SYNC_INTERVAL_MINUTES (companion worker).")
+    def canvas_sync_command(loop):
+        """Fetch the Canvas report and import it now."""
+        if loop:
+            minutes = app.config.get("CANVAS_SYNC_INTERVAL_MINUTES") or 60
+            _scheduler_loop(app, timedelta(minutes=minutes), app.config.get("ATTENDANCE_REPLAY_INTERVAL_SECONDS", 0))
+            return
+        try:
+            run = run_canvas_sync(trigger="cli")
+        except LockBusy:
+            raise click.ClickException("Another import is already running")
+        click.echo(f"Canvas sync finished in {run.duration_ms}ms ({run.detail})")
+
+    # Started from the first request rather than here so CLI commands and a
+    # preloading gunicorn master never run a scheduler thread themselves
+    @app.before_request
+    def _ensure_scheduler():
+        if not _scheduler_started and app.config.get("CANVAS_SYNC_IN_APP", True):
+            start_scheduler(app)
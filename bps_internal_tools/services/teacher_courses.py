@@ -0,0 +1,111 @@
+"""Keep the ``teacher_courses`` picker table in step with imported data.
+
+The TOC course picker lists a teacher's Canvas courses (ids like ``c003936``)
+in the active terms, ordered by name.  Rather than join, filter and sort
+``courses``/``enrollments`` on every visit, :func:`rebuild_teacher_courses`
+materializes those rows with their display name and sort key; reading them
+is then a primary-key range scan.
+
+It runs at the end of every data import (see
+:func:`bps_internal_tools.services.sync.data_import_run`), including the one
+:func:`set_active_terms` starts when an admin changes the terms, and for a
+single course after its roster is refreshed.
+"""
+
+import re
+from typing import Iterable, List, Optional
+
+from sqlalchemy import bindparam, delete, func, select
+from sqlalchemy.orm import Session
+
+from bps_internal_tools.config import DEFAULT_TERMS
+from bps_internal_tools.extensions import db
+from bps_internal_tools.models import AppSetting, Course, Enrollment, TeacherCourse
+from bps_internal_tools.services.replica import read_bind_arguments
+from bps_internal_tools.services.settings import ACTIVE_TERMS_KEY, parse_terms, set_setting
+
+_COURSE_ID_RE = re.compile(r"^c[0-9]+$")
+_SORT_KEY_LEN = TeacherCourse.__table__.c.sort_key.type.length
+_PICKER_STMT = (
+    select(TeacherCourse.course_id, TeacherCourse.display_name)
+    .where(TeacherCourse.teacher_id == bindparam("teacher_id"))
+    .order_by(TeacherCourse.sort_key, TeacherCourse.course_id)
+)
+
+
+def _active_terms(session: Session) -> List[str]:
+    # Read through *session* (not the settings cache) so scripts can call this
+    row = session.get(AppSetting, ACTIVE_TERMS_KEY)
+    return list(DEFAULT_TERMS) if row is None or row.value is None else parse_terms(row.value)
+
+
+def rebuild_teacher_courses(session: Session, course_ids: Optional[Iterable[str]] = None) -> int:
+    """Rewrite ``teacher_courses`` (only *course_ids*' rows if given); the caller commits.
+
+    Returns:
+        Number of rows written.
+    """
+    session.flush()
+    terms = _active_terms(session)
+    stmt = (
+        select(Enrollment.user_id, Course.course_id, Course.short_name, Course.long_name)
+        .join(Course, Course.course_id == Enrollment.course_id)
+        .where(Enrollment.role == "teacher")
+        .where(Enrollment.user_id.is_not(None))
+        .where(Course.course_id.like("c%"))
+        .where(Course.term_id.in_(terms))
+        .distinct()
+    )
+    cleanup = delete(TeacherCourse)
+    if course_ids is not None:
+        course_ids = list(course_ids)
+        stmt = stmt.where(Course.course_id.in_(course_ids))
+        cleanup = cleanup.where(TeacherCourse.course_id.in_(course_ids))
+
+    rows = []
+    for teacher_id, course_id, short, long_ in session.execute(stmt):
+        if not _COURSE_ID_RE.match(course_id):
+            continue
+        rows.append({
+            "teacher_id": teacher_id,
+            "course_id": course_id,
+            "display_name": f"{short or ''} — {long_ or ''}",
+            "sort_key": (long_ or short or course_id).lower()[:_SORT_KEY_LEN],
+        })
+    session.execute(cleanup)
+    if rows:
+        session.execute(TeacherCourse.__table__.insert(), rows)
+    return len(rows)
+
+
+def get_teacher_courses(teacher_id: str) -> List[dict]:
+    """The course picker rows for *teacher_id*, in display order."""
+    rows = db.session.execute(
+        _PICKER_STMT, {"teacher_id": teacher_id}, bind_arguments=read_bind_arguments()
+    ).all()
+    return [{"course_id": cid, "display_name": name} for cid, name in rows]
+
+
+def count_teacher_courses() -> int:
+    return db.session.execute(select(func.count()).select_from(TeacherCourse)).scalar_one()
+
+
+def set_active_terms(raw: str, *, trigger: str = "manual") -> List[str]:
+    """Store the active term list and rebuild the picker table for it.
+
+    The rebuild runs as a (data-less) import so it never overlaps one.
+
+    Raises:
+        ValueError: If *raw* names no terms.
+        LockBusy: If an import is running; the terms are saved and that
+            import's rebuild picks them up.
+    """
+    from bps_internal_tools.services.sync import data_import_run
+
+    terms = parse_terms(raw)
+    if not terms:
+        raise ValueError("At least one term is required.")
+    set_setting(ACTIVE_TERMS_KEY, ",".join(terms))
+    with data_import_run(db.session, "active_terms", trigger=trigger) as run:
+        run.detail = f"terms={','.join(terms)}"
+    return terms
@@ -3,29 +3,24 @@ import os
 import csv
 
 from datetime import datetime, time
+from functools import lru_cache
 import pytz
 
 def format_time(datetime_obj):
     """Formats a datetime object into a 12-hour time string."""
     return datetime_obj.strftime('%I:%M %p')
 
+@lru_cache(maxsize=1)
 def get_version_info():
-    try:
-        # Define the path to the version info file
-        commit_hash_file_path = "/app/git_commit.txt"
-        version_name_file_path = "/app/git_version.txt"
-        
-        # Open and read the file
-        with open(commit_hash_file_path, "r") as file:
-            commit = file.read().strip()
+    """Build version/commit written by the Docker build; read once per process."""
+    def read(path):
+        try:
+            with open(path, "r") as file:
+                return file.read().strip() or "unknown"
+        except FileNotFoundError:
+            return "unknown"
 
-        with open(version_name_file_path, "r") as file:
-            version = file.read().strip()
-        
-        return {
-            "version": version,
-            "commit": commit
-        }
-    except FileNotFoundError:
-        # Return a default message if the file is not found
-        return "Version information not available"
+    return {
+        "version": read("/app/git_version.txt"),
+        "commit": read("/app/git_commit.txt"),
+    }
@@ -0,0 +1,51 @@
+"""Pre-fork warm-up for a preloaded gunicorn master (``GUNICORN_PRELOAD``).
+
+The master builds the app once, loads the read-mostly data every request
+needs and then forks; workers start with those caches filled and share the
+memory copy-on-write instead of each querying the DB on its first requests.
+DB connections must not cross the fork, so the master closes its pools
+before forking and each worker starts with fresh ones.
+"""
+
+import gc
+
+from bps_internal_tools.extensions import db
+
+
+def warm_caches(app) -> None:
+    """Fill the per-process caches (needs no request)."""
+    from bps_internal_tools.extensions import google_oauth
+    from bps_internal_tools.services.auth import role_grants
+    from bps_internal_tools.services.queries import get_grade_sections, get_teacher_directory
+    from bps_internal_tools.services.settings import get_system_timezone
+
+    with app.app_context():
+        get_system_timezone()
+        role_grants()
+        get_grade_sections()
+        get_teacher_directory()
+        if app.config.get("GOOGLE_CLIENT_ID"):
+            # Imports Authlib and reads the shared OIDC cache once for all workers
+            try:
+                google_oauth()
+            except Exception:
+                app.logger.warning("Could not prepare Google sign-in before fork", exc_info=True)
+        db.session.remove()
+
+
+def prepare_fork(app) -> None:
+    """Warm caches, close DB connections and freeze the heap before forking."""
+    warm_caches(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    # Keep the cyclic GC from touching (and so copying) the shared objects
+    gc.freeze()
+
+
+def after_fork(app) -> None:
+    """Give a freshly forked worker its own connection pools."""
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False: never close sockets another process might own
+            engine.dispose(close=False)
@@ -15,8 +15,12 @@ from sqlalchemy import select
 
 from bps_internal_tools.extensions import db
 from bps_internal_tools.models import People, UserImport, UserChangeLog
-from bps_internal_tools.services.auth import login_required, tool_required
+from bps_internal_tools.services.auth import current_user, login_required, tool_required
 from bps_internal_tools.services.canvas import CanvasAPIError, sis_import
+from bps_internal_tools.services.locks import LockBusy
+from bps_internal_tools.services.people import refresh_account_links
+from bps_internal_tools.services.settings import bump_data_version
+from bps_internal_tools.services.sync import data_import_run, recent_runs
 from . import sis_sync_bp, TOOL_SLUG
 
 
@@ -26,6 +30,7 @@ from . import sis_sync_bp, TOOL_SLUG
 def index():
     return render_template(
         "sis_sync/index.html",
+        runs=recent_runs(),
         page_title="SIS Sync",
         page_subtitle="Sync users from MySchool",
         active_tool="SIS Sync",
@@ -40,30 +45,8 @@ def _format_user_id(raw_id: str) -> str:
         return ""
 
 
-@sis_sync_bp.route("/import", methods=["POST"])
-@login_required
-@tool_required(TOOL_SLUG)
-def import_csv():
-    file = request.files.get("file")
-    if not file:
-        flash("No file uploaded", "error")
-        return redirect(url_for("sis_sync.index"))
-
-    text = file.read().decode("utf-8-sig")
-    reader = csv.DictReader(io.StringIO(text))
-    incoming = []
-    for row in reader:
-        uid = _format_user_id(row.get("USER ID"))
-        if not uid:
-            continue
-        incoming.append({
-            "user_id": uid,
-            "first_name": row.get("NAME", "").strip(),
-            "last_name": row.get("SURNAME", "").strip(),
-            "email": (row.get("EMAIL", "") or "").lower(),
-            "grade": row.get("CLASS LEVEL", "").strip(),
-        })
-
+def _apply_import(incoming):
+    """Apply parsed MySchool rows to ``users_canvas``, logging every change."""
     existing = {p.user_id: p for p in db.session.scalars(select(People)).all() if re.match(r"^u\d{6}$", p.user_id or "")}
 
     seen_ids = set()
@@ -145,6 +128,40 @@ def import_csv():
             db.session.add(UserChangeLog(import_id=import_log.id, user_id=uid, field="status", old_value=old, new_value="suspended", changed_at=now))
 
     db.session.commit()
+
+
+@sis_sync_bp.route("/import", methods=["POST"])
+@login_required
+@tool_required(TOOL_SLUG)
+def import_csv():
+    file = request.files.get("file")
+    if not file:
+        flash("No file uploaded", "error")
+        return redirect(url_for("sis_sync.index"))
+
+    text = file.read().decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(text))
+    incoming = []
+    for row in reader:
+        uid = _format_user_id(row.get("USER ID"))
+        if not uid:
+            continue
+        incoming.append({
+            "user_id": uid,
+            "first_name": row.get("NAME", "").strip(),
+            "last_name": row.get("SURNAME", "").strip(),
+            "email": (row.get("EMAIL", "") or "").lower(),
+            "grade": row.get("CLASS LEVEL", "").strip(),
+        })
+
+    user = current_user() or {}
+    try:
+        with data_import_run(db.session, "sis_import", trigger=f"upload:{user.get('username', '')}") as run:
+            _apply_import(incoming)
+            run.detail = f"rows={len(incoming)}"
+    except LockBusy:
+        flash("Another data import is running. Please try again in a few minutes.", "error")
+        return redirect(url_for("sis_sync.index"))
     flash("Import complete", "success")
     return redirect(url_for("sis_sync.index"))
 
@@ -288,6 +305,9 @@ def custom_users():
                 status_changed_at=now,
             )
             db.session.add(person)
+        refresh_account_links(db.session, [uid])
+        # Names and status feed the cached teacher directory
+        bump_data_version()
         db.session.commit()
         return redirect(url_for("sis_sync.custom_users"))
 
@@ -0,0 +1,130 @@
+# bps_internal_tools/sql_instrumentation.py
+"""Per-request SQL accounting.
+
+Every statement run while handling a request is counted and timed in ``g``.
+On the way out:
+
+* statements slower than ``SQL_SLOW_QUERY_MS`` have already been logged with
+  the database's EXPLAIN plan (never with their bound parameters, which can
+  be emails or password hashes),
+* a statement issued ``SQL_REPEAT_THRESHOLD`` or more times in one request is
+  logged as an N+1 candidate, and
+* with ``SQL_SERVER_TIMING`` on (dev), a ``Server-Timing`` header reports the
+  query count and DB time so they show up in the browser's network panel.
+"""
+
+import logging
+import time
+from collections import Counter
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+
+from bps_internal_tools.extensions import db
+
+log = logging.getLogger(__name__)
+
+_EXPLAIN_PREFIX = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "mysql": "EXPLAIN ",
+    "mariadb": "EXPLAIN ",
+    "postgresql": "EXPLAIN ",
+}
+
+
+class RequestSQLStats:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+
+def request_sql_stats():
+    """The current request's :class:`RequestSQLStats` (``None`` outside a request)."""
+    if not has_request_context():
+        return None
+    stats = g.get("_sql_stats")
+    if stats is None:
+        stats = g._sql_stats = RequestSQLStats()
+    return stats
+
+
+def _explain(conn, statement, parameters):
+    prefix = _EXPLAIN_PREFIX.get(conn.dialect.name)
+    if not prefix or not statement.lstrip().upper().startswith("SELECT"):
+        return None
+    # Raw DBAPI cursor so the EXPLAIN itself doesn't re-enter these hooks
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join("  " + " | ".join(str(c) for c in row) for row in cursor.fetchall())
+    except Exception as exc:
+        return f"  (EXPLAIN failed: {exc})"
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_sql_started", []).append((context, time.perf_counter()))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("_sql_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()[1]
+
+    stats = request_sql_stats()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.statements[statement] += 1
+
+    slow_ms = current_app.config.get("SQL_SLOW_QUERY_MS", 0) if has_app_context() else 0
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        plan = None if executemany else _explain(conn, statement, parameters)
+        log.warning(
+            "Slow query (%.1f ms)%s: %s%s",
+            elapsed * 1000,
+            f" in {request.endpoint}" if has_request_context() else "",
+            statement,
+            f"\nplan:\n{plan}" if plan else "",
+        )
+
+
+def _handle_error(context) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    started = context.connection.info.get("_sql_started") if context.connection is not None else None
+    if started and started[-1][0] is context.execution_context:
+        started.pop()
+
+
+def init_app(app) -> None:
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+    @app.after_request
+    def _report_sql(resp):
+        stats = g.get("_sql_stats")
+        if stats is None:
+            return resp
+
+        threshold = app.config.get("SQL_REPEAT_THRESHOLD", 0)
+        if threshold:
+            for statement, n in stats.statements.most_common():
+                if n < threshold:
+                    break
+                log.warning("Possible N+1 in %s: statement ran %d times: %s", request.endpoint, n, statement)
+
+        if app.config.get("SQL_SERVER_TIMING"):
+            resp.headers.add(
+                "Server-Timing",
+                f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"',
+            )
+        return resp
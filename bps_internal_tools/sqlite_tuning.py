@@ -0,0 +1,81 @@
+# bps_internal_tools/sqlite_tuning.py
+"""SQLite deployment profile.
+
+Every new connection to a SQLite database (primary or replica) gets
+
+* ``journal_mode=WAL`` so readers keep reading while an import writes,
+* ``busy_timeout`` so a second writer waits for the lock instead of failing
+  with "database is locked",
+* ``synchronous=NORMAL`` (safe with WAL, far fewer fsyncs), a memory-mapped
+  I/O window and a larger page cache, and
+* a ``REGEXP`` function (SQLite parses ``x REGEXP y`` but ships no
+  implementation), with compiled patterns cached.
+
+Values come from the ``SQLITE_*`` settings; other databases are untouched.
+Scripts that build their own engine call :func:`configure_engine`.
+"""
+
+import re
+from functools import lru_cache
+
+from sqlalchemy import event
+
+from bps_internal_tools.extensions import db
+
+_JOURNAL_MODES = {"WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"}
+_SYNCHRONOUS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+@lru_cache(maxsize=64)
+def _compile(pattern: str):
+    return re.compile(pattern)
+
+
+def _regexp(pattern, value) -> bool:
+    # SQLite calls regexp(pattern, value) for "value REGEXP pattern"
+    return value is not None and _compile(pattern).search(value) is not None
+
+
+def pragmas_from_config(config) -> dict:
+    """PRAGMA name → value from a Flask config (or any mapping of settings)."""
+    journal = str(config.get("SQLITE_JOURNAL_MODE", "WAL")).upper()
+    synchronous = str(config.get("SQLITE_SYNCHRONOUS", "NORMAL")).upper()
+    if journal not in _JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE must be one of {sorted(_JOURNAL_MODES)}")
+    if synchronous not in _SYNCHRONOUS:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {sorted(_SYNCHRONOUS)}")
+    return {
+        "journal_mode": journal,
+        "busy_timeout": int(config.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+        "synchronous": synchronous,
+        "mmap_size": int(config.get("SQLITE_MMAP_SIZE", 0)),
+        # Negative cache_size is in KiB rather than pages
+        "cache_size": -int(config.get("SQLITE_CACHE_SIZE_KB", 2000)),
+        "temp_store": "MEMORY",
+    }
+
+
+def configure_engine(engine, pragmas: dict) -> None:
+    """Apply *pragmas* and ``REGEXP`` to each new connection of a SQLite *engine*."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        dbapi_conn.create_function("REGEXP", 2, _regexp, deterministic=True)
+        cursor = dbapi_conn.cursor()
+        try:
+            for name, value in pragmas.items():
+                if name == "journal_mode" and engine.url.database in (None, "", ":memory:"):
+                    continue  # in-memory databases can't use WAL
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def init_app(app) -> None:
+    pragmas = pragmas_from_config(app.config)
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        configure_engine(engine, pragmas)
@@ -1,6 +1,30 @@
 function debounce(fn, ms){ let t; return (...a)=>{ clearTimeout(t); t=setTimeout(()=>fn(...a), ms); }; }
 
-function setupTeacherSearch({inputId, listId, clearId, searchUrl, onPick}){
+// Must match normalize_name() in services/queries.py
+function normalizeName(s){
+  return (s || '').normalize('NFKD').replace(/[\u0300-\u036f]/g, '').toLowerCase().split(/\s+/).filter(Boolean).join(' ');
+}
+
+const DIRECTORY_KEY = 'toc.teacherDirectory';
+
+// Resolves to the teacher directory for `version` (from localStorage or the
+// server), or null if it can't be had; callers then search on the server.
+function loadTeacherDirectory(url, version){
+  try{
+    const stored = JSON.parse(localStorage.getItem(DIRECTORY_KEY) || 'null');
+    if (stored && stored.version === version) return Promise.resolve(stored);
+  }catch(err){ /* storage disabled or corrupt: refetch */ }
+  return fetch(url)
+    .then(res => { if (!res.ok) throw new Error('HTTP '+res.status); return res.json(); })
+    .then(dir => {
+      try{ localStorage.setItem(DIRECTORY_KEY, JSON.stringify(dir)); }catch(err){ /* quota: keep in memory */ }
+      // An import landed since the page was rendered: use the server until reload
+      return dir.version === version ? dir : null;
+    })
+    .catch(err => { console.error('Teacher directory error:', err); return null; });
+}
+
+function setupTeacherSearch({inputId, listId, clearId, searchUrl, directoryUrl, directoryVersion, onPick}){
   const $i = document.getElementById(inputId);
   const $list = document.getElementById(listId);
   const $clear = document.getElementById(clearId);
@@ -23,19 +47,36 @@ function setupTeacherSearch({inputId, listId, clearId, searchUrl, onPick}){
     $i.setAttribute('aria-expanded','true');
   };
 
-  const search = debounce(async (q)=>{
-    if (q.trim().length < 2){ render([]); return; }
+  let directory = null;
+  if (directoryUrl){
+    loadTeacherDirectory(directoryUrl, directoryVersion).then(dir => { directory = dir; });
+  }
+
+  const matchLocal = (q)=>{
+    const terms = normalizeName(q).split(' ');
+    return directory.teachers
+      .filter(([, , key]) => terms.every(t => key.includes(t)))
+      .map(([id, name]) => ({id, name}));
+  };
+
+  const searchServer = debounce(async (q)=>{
     try{
       const res = await fetch(`${searchUrl}?q=${encodeURIComponent(q)}`);
       if (!res.ok) throw new Error('HTTP '+res.status);
       const data = await res.json();
-      render(data);
+      if ($i.value === q) render(data);  // ignore answers to an outdated query
     }catch(err){
       console.error('Autocomplete error:', err);
       render([]);
     }
   }, 160);
 
+  const search = (q)=>{
+    if (q.trim().length < 2){ render([]); return; }
+    if (directory) render(matchLocal(q));
+    else searchServer(q);
+  };
+
   $i.addEventListener('input', (e)=> search(e.target.value));
   $i.addEventListener('focus', ()=> { if($list.children.length) $list.style.display='block'; });
   document.addEventListener('click', (e)=>{ if(!e.target.closest('.ac-wrap')){ $list.style.display='none'; $i.setAttribute('aria-expanded','false'); }});
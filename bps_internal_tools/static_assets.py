@@ -0,0 +1,106 @@
+# bps_internal_tools/static_assets.py
+"""Fingerprinted static files and compressed responses.
+
+When ``scripts/build-static-assets.py`` has written its manifest,
+``url_for('static', filename='app.js')`` emits the fingerprinted name
+(``dist/app.<hash>.js``) and those files are served with a one-year
+``immutable`` Cache-Control, picking the prebuilt ``.br`` or ``.gz`` variant
+the browser accepts.  A changed file gets a new name, so browsers only
+re-download what actually changed.  Without a manifest the originals are
+served as before.
+
+HTML, JSON and other text responses of at least ``COMPRESS_MIN_BYTES`` are
+gzipped on the fly when the client accepts it (0 disables).
+"""
+
+import gzip
+import json
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+COMPRESS_MIMETYPES = {
+    "text/html", "text/plain", "text/css", "text/csv", "text/javascript",
+    "application/javascript", "application/json", "image/svg+xml",
+}
+# Preferred first
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_fingerprinted: dict = {}  # fingerprinted name -> encodings with a prebuilt variant
+
+
+def _load_manifest(app) -> dict:
+    path = app.config.get("STATIC_MANIFEST") or os.path.join(app.static_folder, "dist", "manifest.json")
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def serve_static(filename: str):
+    """Flask's ``static`` view, with precompressed, immutable fingerprinted files."""
+    app = current_app
+    encodings = _fingerprinted.get(filename)
+    if encodings is None:
+        return app.send_static_file(filename)
+    for encoding, suffix in _ENCODINGS:
+        if encoding in encodings and encoding in request.accept_encodings:
+            resp = send_from_directory(
+                app.static_folder, filename + suffix, mimetype=mimetypes.guess_type(filename)[0]
+            )
+            resp.headers["Content-Encoding"] = encoding
+            break
+    else:
+        resp = send_from_directory(app.static_folder, filename)
+    resp.headers["Cache-Control"] = IMMUTABLE
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
+def _compress_response(resp):
+    min_bytes = current_app.config.get("COMPRESS_MIN_BYTES", 1024)
+    if (
+        resp.direct_passthrough  # files: precompressed or not worth it
+        or resp.is_streamed
+        or resp.status_code < 200
+        or resp.status_code in (204, 304)
+        or "Content-Encoding" in resp.headers
+        or resp.mimetype not in COMPRESS_MIMETYPES
+        or "gzip" not in request.accept_encodings
+    ):
+        return resp
+    data = resp.get_data()
+    if len(data) < min_bytes:
+        return resp
+    resp.set_data(gzip.compress(data, compresslevel=6))
+    resp.headers["Content-Encoding"] = "gzip"
+    resp.vary.add("Accept-Encoding")
+    etag, weak = resp.get_etag()
+    if etag and not weak:
+        # The bytes changed, so a strong validator no longer applies
+        resp.set_etag(etag, weak=True)
+    return resp
+
+
+def init_app(app) -> None:
+    manifest = _load_manifest(app)
+    if manifest:
+        dist_files = set()
+        for root, _dirs, files in os.walk(os.path.join(app.static_folder, "dist")):
+            rel = os.path.relpath(root, app.static_folder)
+            dist_files.update(os.path.join(rel, f).replace(os.sep, "/") for f in files)
+        for name in manifest.values():
+            _fingerprinted[name] = {enc for enc, suffix in _ENCODINGS if name + suffix in dist_files}
+
+        @app.url_defaults
+        def _fingerprint_static(endpoint, values):
+            if endpoint == "static":
+                values["filename"] = manifest.get(values.get("filename"), values.get("filename"))
+
+        app.view_functions["static"] = serve_static
+
+    if app.config.get("COMPRESS_MIN_BYTES", 1024) > 0:
+        app.after_request(_compress_response)
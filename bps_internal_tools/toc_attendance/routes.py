@@ -1,9 +1,10 @@
-from flask import render_template, request, redirect, url_for
+import requests
+from flask import g, render_template, request, redirect, url_for, flash
+from bps_internal_tools.extensions import db
 from bps_internal_tools.services.auth import login_required, current_user, tool_required
 from . import toc_bp, TOOL_SLUG
 from bps_internal_tools.services.queries import (
     search_teacher_by_name,
-    get_courses_for_user,
     get_students_in_course,
     get_students_in_grade_section,
     get_teachers_in_course,
@@ -11,9 +12,14 @@ from bps_internal_tools.services.queries import (
     get_grade_sections,
     get_grade_section,
     get_person,
+    get_teacher_directory,
 )
-from bps_internal_tools.services.sheets import log_attendance
-from bps_internal_tools.config import DEFAULT_TERMS
+from bps_internal_tools.services.settings import get_data_version
+from bps_internal_tools.services.http_cache import conditional_get
+from bps_internal_tools.services.roster import ensure_fresh_roster, refresh_course_roster, roster_refreshed_at
+from bps_internal_tools.services.canvas import CanvasAPIError
+from bps_internal_tools.services.attendance_queue import submit_attendance
+from bps_internal_tools.services.teacher_courses import get_teacher_courses
 
 
 @toc_bp.route("/", methods=["GET"])
@@ -31,6 +37,7 @@ def index():
     return render_template(
         "toc-attendance/index.html",
         grade_sections=grade_sections,
+        directory_version=get_data_version(),
         page_title="TOC Attendance",
         page_subtitle="Simple attendance form class coverage.",
         active_tool="TOC Attendance",
@@ -39,15 +46,34 @@ def index():
 @toc_bp.route("/search-teachers")
 @login_required
 @tool_required(TOOL_SLUG)
+@conditional_get()
 def search_teachers():
     from flask import jsonify, request
     q = request.args.get("q", "")
     teachers = search_teacher_by_name(q) if q else []
     return jsonify([{"name": t["full_name"], "id": t["user_id"]} for t in teachers])
 
+@toc_bp.route("/teacher-directory")
+@login_required
+@tool_required(TOOL_SLUG)
+@conditional_get()
+def teacher_directory():
+    """Every active teacher as ``[id, name, search key]`` for client-side matching."""
+    from flask import jsonify
+    version = get_data_version()
+    resp = jsonify({
+        "version": version,
+        "teachers": [[t["user_id"], t["full_name"], t["key"]] for t in get_teacher_directory()],
+    })
+    # The page links ?v=<data version>; that URL's content never changes
+    if request.args.get("v") == version:
+        resp.headers["Cache-Control"] = "private, max-age=86400, immutable"
+    return resp
+
 @toc_bp.route("/select_course/<teacher_id>", methods=["GET","POST"])
 @login_required
 @tool_required(TOOL_SLUG)
+@conditional_get()
 def select_course(teacher_id):
     if request.method == "POST":
         course_id = request.form["course_id"]
@@ -57,7 +83,7 @@ def select_course(teacher_id):
                 "toc.take_attendance", course_id=course_id, teacher_id=teacher_id, block=block
             )
         )
-    courses = get_courses_for_user(teacher_id, role="teacher", terms=DEFAULT_TERMS)
+    courses = get_teacher_courses(teacher_id)
     teacher = get_person(teacher_id)
     return render_template(
         "toc-attendance/select_course.html",
@@ -69,11 +95,28 @@ def select_course(teacher_id):
         active_tool="TOC Attendance",
     )
 
+def _ensure_fresh_roster_once(course_id):
+    # The ETag check and the view both need a fresh roster; refresh (or
+    # check) once per request so the page matches the ETag it is sent with
+    checked = g.setdefault("_rosters_checked", set())
+    if course_id not in checked:
+        checked.add(course_id)
+        ensure_fresh_roster(course_id)
+
+def _roster_stamp(course_id):
+    # A stale roster is refreshed first so the ETag reflects what will be shown
+    _ensure_fresh_roster_once(course_id)
+    return [roster_refreshed_at(course_id)]
+
 @toc_bp.route("/take_attendance/<course_id>", methods=["GET","POST"])
 @login_required
 @tool_required(TOOL_SLUG)
+@conditional_get(_roster_stamp)
 def take_attendance(course_id):
     block = request.args.get("block") if request.method == "GET" else request.form.get("block")
+    if request.method == "GET":
+        # Already done by the ETag check unless it was skipped (pending flashes)
+        _ensure_fresh_roster_once(course_id)
     students = get_students_in_course(course_id)
     info = get_course_info(course_id)  # returns {'short_name':..., 'long_name':...}
     base_course_name = info.get("long_name") or info.get("short_name") or "Unknown Course"
@@ -85,11 +128,12 @@ def take_attendance(course_id):
         absent_ids = request.form.getlist("absent")
         absent_students = [s for s in students if str(s["user_id"]) in absent_ids]
         submitter = current_user().get("display_name") or current_user().get("username")
-        log_attendance(absent_students, course_name, teachers, submitted_by=submitter)
+        sent = submit_attendance(absent_students, course_name, teachers, submitted_by=submitter)
         return render_template(
             "toc-attendance/take_attendance.html",
             students=students,
             submitted=True,
+            queued=not sent,
             absent_ids=absent_ids,
             course_name=course_name,
             teacher_id=teacher_id,
@@ -103,6 +147,7 @@ def take_attendance(course_id):
         students=students,
         submitted=False,
         course_name=course_name,
+        course_id=course_id,
         teacher_id=teacher_id,
         block=block,
         page_title="TOC Attendance",
@@ -110,9 +155,28 @@ def take_attendance(course_id):
         active_tool="TOC Attendance",
     )
 
+@toc_bp.route("/refresh_roster/<course_id>", methods=["POST"])
+@login_required
+@tool_required(TOOL_SLUG)
+def refresh_roster(course_id):
+    try:
+        refresh_course_roster(course_id)
+    except (CanvasAPIError, requests.RequestException) as exc:
+        db.session.rollback()
+        flash(f"Could not refresh roster from Canvas: {exc}", "error")
+    return redirect(
+        url_for(
+            "toc.take_attendance",
+            course_id=course_id,
+            teacher_id=request.form.get("teacher_id") or None,
+            block=request.form.get("block") or None,
+        )
+    )
+
 @toc_bp.route("/grade/<int:grade_section_id>", methods=["GET", "POST"])
 @login_required
 @tool_required(TOOL_SLUG)
+@conditional_get()
 def take_attendance_grade(grade_section_id):
     section = get_grade_section(grade_section_id)
     block = request.args.get("block")
@@ -145,11 +209,12 @@ def take_attendance_grade(grade_section_id):
         absent_ids = request.form.getlist("absent")
         absent_students = [s for s in students if str(s["user_id"]) in absent_ids]
         submitter = current_user().get("display_name") or current_user().get("username")
-        log_attendance(absent_students, course_name, [], submitted_by=submitter)
+        sent = submit_attendance(absent_students, course_name, [], submitted_by=submitter)
         return render_template(
             "toc-attendance/take_attendance.html",
             students=students,
             submitted=True,
+            queued=not sent,
             absent_ids=absent_ids,
             course_name=course_name,
             teacher_id=None,
@@ -0,0 +1,201 @@
+# bps_internal_tools/tracing.py
+"""Lightweight request tracing exported as Zipkin v2 JSON lines.
+
+Set ``TRACE_EXPORT`` to a file path (or ``-`` for stdout) to turn tracing on.
+Each request becomes a ``SERVER`` span, continuing the caller's trace when a
+W3C ``traceparent`` header is present, and every DB statement and outbound
+call (see :func:`bps_internal_tools.metrics.external_call`) is a child span.
+Spans are written one JSON object per line as they finish, so a file from a
+load test can be replayed offline, e.g. by POSTing the lines as a JSON array
+to a local Zipkin/Jaeger ``/api/v2/spans`` endpoint.
+
+With ``TRACE_EXPORT`` unset, :func:`span` is a no-op.
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+
+from bps_internal_tools.extensions import db
+
+SERVICE_NAME = "bps-internal-tools"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current = ContextVar("bps_trace_span", default=None)
+_exporter = None
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_us", "_t0", "tags", "sampled")
+
+    def __init__(self, name, *, kind=None, parent=None, trace_id=None, parent_id=None, sampled=True, tags=None):
+        self.trace_id = parent.trace_id if parent else (trace_id or f"{random.getrandbits(128):032x}")
+        self.parent_id = parent.span_id if parent else parent_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.sampled = parent.sampled if parent else sampled
+        self.name = name
+        self.kind = kind
+        self.tags = {k: str(v) for k, v in (tags or {}).items()}
+        self.start_us = int(time.time() * 1_000_000)
+        self._t0 = time.perf_counter()
+
+    def set_tag(self, key, value) -> None:
+        self.tags[key] = str(value)
+
+    def finish(self) -> None:
+        if _exporter is None or not self.sampled:
+            return
+        record = {
+            "traceId": self.trace_id,
+            "id": self.span_id,
+            "name": self.name,
+            "timestamp": self.start_us,
+            "duration": max(int((time.perf_counter() - self._t0) * 1_000_000), 1),
+            "localEndpoint": {"serviceName": SERVICE_NAME},
+        }
+        if self.parent_id:
+            record["parentId"] = self.parent_id
+        if self.kind:
+            record["kind"] = self.kind
+        if self.tags:
+            record["tags"] = self.tags
+        _exporter.export(record)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+class JsonLinesExporter:
+    """Append finished spans to a file (or stdout) as Zipkin v2 JSON lines."""
+
+    def __init__(self, target: str):
+        self._lock = threading.Lock()
+        if target == "-":
+            self._fh = sys.stdout
+        else:
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            # Line buffered append: each span is one write, so gunicorn
+            # workers can share the file
+            self._fh = open(target, "a", buffering=1, encoding="utf-8")
+
+    def export(self, record: dict) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._fh.write(line)
+
+
+def current_span():
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, *, kind: str | None = None, **tags):
+    """Run the block inside a child span of the current span."""
+    if _exporter is None:
+        yield None
+        return
+    s = Span(name, kind=kind, parent=_current.get(), tags=tags)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as exc:
+        s.set_tag("error", type(exc).__name__)
+        raise
+    finally:
+        _current.reset(token)
+        s.finish()
+
+
+def _parse_traceparent(header: str | None):
+    m = _TRACEPARENT_RE.match((header or "").strip().lower())
+    if not m or m.group(1) == "0" * 32 or m.group(2) == "0" * 16:
+        return None
+    return m.group(1), m.group(2), bool(int(m.group(3), 16) & 1)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    if parent is None:
+        return
+    s = Span("db.query", kind="CLIENT", parent=parent, tags={
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:500],
+    })
+    conn.info.setdefault("_trace_spans", []).append((context, s))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("_trace_spans")
+    if spans and spans[-1][0] is context:
+        spans.pop()[1].finish()
+
+
+def _handle_error(context) -> None:
+    # A failed statement never reaches after_cursor_execute; close its span here
+    spans = context.connection.info.get("_trace_spans") if context.connection is not None else None
+    if spans and spans[-1][0] is context.execution_context:
+        s = spans.pop()[1]
+        s.set_tag("error", type(context.original_exception).__name__)
+        s.finish()
+
+
+def init_app(app) -> None:
+    global _exporter
+    target = app.config.get("TRACE_EXPORT")
+    if not target:
+        return
+    _exporter = JsonLinesExporter(target)
+    sample_rate = app.config.get("TRACE_SAMPLE_RATE", 1.0)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+    @app.before_request
+    def _start_request_span():
+        incoming = _parse_traceparent(request.headers.get("traceparent"))
+        if incoming:
+            trace_id, parent_id, sampled = incoming
+        else:
+            trace_id, parent_id, sampled = None, None, random.random() < sample_rate
+        s = Span(
+            f"{request.method} {request.url_rule.rule if request.url_rule else 'unmatched'}",
+            kind="SERVER",
+            trace_id=trace_id,
+            parent_id=parent_id,
+            sampled=sampled,
+            tags={"http.method": request.method, "http.path": request.path},
+        )
+        _current.set(s)
+        g._trace = s
+
+    @app.after_request
+    def _tag_response(resp):
+        s = g.get("_trace")
+        if s is not None:
+            s.set_tag("http.status_code", resp.status_code)
+            resp.headers["traceparent"] = s.traceparent
+        return resp
+
+    @app.teardown_request
+    def _finish_request_span(exc):
+        s = g.pop("_trace", None)
+        if s is None:
+            return
+        if exc is not None:
+            s.set_tag("error", type(exc).__name__)
+        _current.set(None)
+        s.finish()
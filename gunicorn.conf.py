@@ -1,10 +1,62 @@
+import os
+import shutil
+
+
+def _cpu_count() -> int:
+    # CPUs this container may use, not the host's
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
 bind = "0.0.0.0:8000"
-worker_class = "gthread"
-workers = 2              # adjust for CPU cores
-threads = 4
+# "gevent" serves each request on a greenlet: while one waits on Sheets, Canvas
+# or Google another runs, so in-flight requests are bounded by
+# worker_connections (and the DB pool for DB work) instead of by threads.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+# 2 x CPUs + 1, capped so a large host doesn't start dozens of app copies
+workers = int(os.getenv("GUNICORN_WORKERS") or min(2 * _cpu_count() + 1, 8))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))  # gthread only
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "200"))  # gevent only
+# Build the app and warm its caches once in the master, then fork. Not with
+# gevent: its monkey-patching must happen before the app is imported.
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true" and worker_class != "gevent"
 timeout = 60             # allow slow cold starts
 graceful_timeout = 30
 keepalive = 5
 accesslog = "-"          # log to stdout
 errorlog = "-"
-loglevel = "info"
\ No newline at end of file
+loglevel = "info"
+
+# Workers write metrics to files here so /metrics can aggregate them.
+# Must be set before the app (and prometheus_client) is imported.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/bps_metrics")
+# A preloaded app is built before on_starting runs
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def on_starting(server):
+    # Stale files from a previous master would be summed into the new one
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from bps_internal_tools.services.warmup import prepare_fork
+        prepare_fork(server.app.wsgi())
+        # The master never serves requests; drop the live gauges warming left
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from bps_internal_tools.services.warmup import after_fork
+        after_fork(server.app.wsgi())
@@ -0,0 +1,27 @@
+"""add course_roster_refreshes table
+
+Revision ID: a81c0d4e2f17
+Revises: f10a3a0e9d0e
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "a81c0d4e2f17"
+down_revision = "f10a3a0e9d0e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "course_roster_refreshes",
+        sa.Column("course_id", sa.String(length=32), primary_key=True, nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("course_roster_refreshes")
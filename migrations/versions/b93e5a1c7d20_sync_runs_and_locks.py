@@ -0,0 +1,45 @@
+"""add sync_runs and sync_locks tables
+
+Revision ID: b93e5a1c7d20
+Revises: a81c0d4e2f17
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b93e5a1c7d20"
+down_revision = "a81c0d4e2f17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "sync_runs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("job", sa.String(length=64), nullable=False),
+        sa.Column("trigger", sa.String(length=128), nullable=True),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("duration_ms", sa.Integer(), nullable=True),
+        sa.Column("host", sa.String(length=255), nullable=True),
+        sa.Column("detail", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_sync_runs_job", "sync_runs", ["job"])
+
+    op.create_table(
+        "sync_locks",
+        sa.Column("name", sa.String(length=64), primary_key=True, nullable=False),
+        sa.Column("holder", sa.String(length=255), nullable=False),
+        sa.Column("acquired_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("sync_locks")
+    op.drop_index("ix_sync_runs_job", table_name="sync_runs")
+    op.drop_table("sync_runs")
@@ -0,0 +1,24 @@
+"""index users_auth for the paginated admin users page
+
+Revision ID: c4d8e2f61a35
+Revises: b93e5a1c7d20
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4d8e2f61a35"
+down_revision = "b93e5a1c7d20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_users_auth_role_username", "users_auth", ["role_name", "username"])
+    op.create_index("ix_users_auth_provider_username", "users_auth", ["auth_provider", "username"])
+
+
+def downgrade():
+    op.drop_index("ix_users_auth_provider_username", table_name="users_auth")
+    op.drop_index("ix_users_auth_role_username", table_name="users_auth")
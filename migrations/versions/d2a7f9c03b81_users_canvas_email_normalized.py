@@ -0,0 +1,62 @@
+"""users_canvas add email_normalized + default Google sign-in roles
+
+Revision ID: d2a7f9c03b81
+Revises: c4d8e2f61a35
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "d2a7f9c03b81"
+down_revision = "c4d8e2f61a35"
+branch_labels = None
+depends_on = None
+
+# Roles Google sign-in assigns to new users
+DEFAULT_ROLES = ("staff_lite", "student_lite")
+
+
+def upgrade():
+    with op.batch_alter_table("users_canvas") as batch_op:
+        batch_op.add_column(sa.Column("email_normalized", sa.String(length=255), nullable=True))
+
+    bind = op.get_bind()
+    people = sa.table(
+        "users_canvas",
+        sa.column("user_id", sa.String),
+        sa.column("email", sa.String),
+        sa.column("email_normalized", sa.String),
+        sa.column("status", sa.String),
+    )
+    # Backfill in sync_email_index's claim order: when an address is shared
+    # an active person keeps it, then the lowest user_id
+    rows = bind.execute(sa.select(people.c.user_id, people.c.email, people.c.status)).all()
+    claimed, updates = set(), []
+    for uid, email, _ in sorted(rows, key=lambda r: (r.status != "active", r.user_id)):
+        norm = (email or "").strip().lower()
+        if norm and norm not in claimed:
+            claimed.add(norm)
+            updates.append({"uid": uid, "norm": norm})
+    if updates:
+        bind.execute(
+            people.update()
+            .where(people.c.user_id == sa.bindparam("uid"))
+            .values(email_normalized=sa.bindparam("norm")),
+            updates,
+        )
+    op.create_index("uq_users_canvas_email_normalized", "users_canvas", ["email_normalized"], unique=True)
+
+    roles = sa.table("roles", sa.column("name", sa.String), sa.column("active", sa.Boolean))
+    existing = set(bind.execute(sa.select(roles.c.name).where(roles.c.name.in_(DEFAULT_ROLES))).scalars())
+    missing = [{"name": name, "active": True} for name in DEFAULT_ROLES if name not in existing]
+    if missing:
+        op.bulk_insert(roles, missing)
+
+
+def downgrade():
+    # Default roles are left in place; users may be assigned to them
+    op.drop_index("uq_users_canvas_email_normalized", table_name="users_canvas")
+    with op.batch_alter_table("users_canvas") as batch_op:
+        batch_op.drop_column("email_normalized")
@@ -0,0 +1,71 @@
+"""teacher_courses materialized course picker table
+
+Revision ID: e5b8c1d94f62
+Revises: d2a7f9c03b81
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "e5b8c1d94f62"
+down_revision = "d2a7f9c03b81"
+branch_labels = None
+depends_on = None
+
+# config.DEFAULT_TERMS at the time of this migration; the app_settings row
+# "active_terms" overrides it from now on
+DEFAULT_TERMS = ("BPS_W25", "BPS_DP24", "BPS_DP25")
+
+
+def upgrade():
+    teacher_courses = op.create_table(
+        "teacher_courses",
+        sa.Column("teacher_id", sa.String(length=64), nullable=False),
+        sa.Column("sort_key", sa.String(length=191), nullable=False),
+        sa.Column("course_id", sa.String(length=32), nullable=False),
+        sa.Column("display_name", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("teacher_id", "sort_key", "course_id"),
+    )
+    op.create_index("ix_teacher_courses_course_id", "teacher_courses", ["course_id"])
+
+    # Backfill so the picker works before the next import rebuilds it
+    bind = op.get_bind()
+    courses = sa.table(
+        "courses",
+        sa.column("course_id", sa.String),
+        sa.column("short_name", sa.String),
+        sa.column("long_name", sa.String),
+        sa.column("term_id", sa.String),
+    )
+    enrollments = sa.table(
+        "enrollments", sa.column("course_id", sa.String), sa.column("user_id", sa.String), sa.column("role", sa.String)
+    )
+    rows = bind.execute(
+        sa.select(enrollments.c.user_id, courses.c.course_id, courses.c.short_name, courses.c.long_name)
+        .join(courses, courses.c.course_id == enrollments.c.course_id)
+        .where(enrollments.c.role == "teacher")
+        .where(enrollments.c.user_id.is_not(None))
+        .where(courses.c.term_id.in_(DEFAULT_TERMS))
+        .distinct()
+    ).all()
+    picker = [
+        {
+            "teacher_id": teacher_id,
+            "course_id": course_id,
+            "display_name": f"{short or ''} — {long_ or ''}",
+            "sort_key": (long_ or short or course_id).lower()[:191],
+        }
+        for teacher_id, course_id, short, long_ in rows
+        if re.match(r"^c[0-9]+$", course_id)
+    ]
+    if picker:
+        op.bulk_insert(teacher_courses, picker)
+
+
+def downgrade():
+    op.drop_index("ix_teacher_courses_course_id", table_name="teacher_courses")
+    op.drop_table("teacher_courses")
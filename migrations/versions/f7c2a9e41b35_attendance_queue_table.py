@@ -0,0 +1,34 @@
+"""attendance_queue table for submissions Google Sheets couldn't take
+
+Revision ID: f7c2a9e41b35
+Revises: e5b8c1d94f62
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "f7c2a9e41b35"
+down_revision = "e5b8c1d94f62"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "attendance_queue",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("submitted_at", sa.DateTime(), nullable=False),
+        sa.Column("course_name", sa.Text(), nullable=False),
+        sa.Column("teachers", sa.Text(), nullable=False),
+        sa.Column("absent_students", sa.Text(), nullable=False),
+        sa.Column("submitted_by", sa.String(length=255), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("attendance_queue")
@@ -0,0 +1,175 @@
+"""Benchmark password logins per second and their effect on other requests.
+
+Starts gunicorn (``gunicorn.conf.py``) on a throwaway SQLite database with
+``--users`` local accounts, then sends ``--logins`` POSTs to ``/auth/login``
+from ``--concurrency`` threads while a probe thread keeps requesting
+``/livez``.  This is done once per ``--hash-workers`` value, so inline hashing
+(0) can be compared with the process pool::
+
+    python scripts/benchmark-logins.py
+    python scripts/benchmark-logins.py --hash-workers 0,2,4 --concurrency 32
+
+For each run it reports logins/s, login latency, how many were turned away
+as busy (HTTP 503) and the ``/livez`` latency during the burst. That last
+figure shows whether logins starve the other request threads.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+PASSWORD = "correct horse battery staple"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark password logins")
+    parser.add_argument("--hash-workers", default="0,2", help="Comma separated PASSWORD_HASH_WORKERS values to compare")
+    parser.add_argument("--users", type=int, default=50, help="Accounts to create")
+    parser.add_argument("--logins", type=int, default=200, help="Logins per run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Client threads sending logins")
+    parser.add_argument("--gunicorn-workers", type=int, default=2, help="GUNICORN_WORKERS for the server")
+    parser.add_argument("--gunicorn-threads", type=int, default=4, help="GUNICORN_THREADS for the server")
+    return parser.parse_args()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _setup_db(db_url: str, users: int) -> None:
+    # BaseConfig reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = db_url
+    from werkzeug.security import generate_password_hash
+
+    from bps_internal_tools import create_app
+    from bps_internal_tools.extensions import db
+    from bps_internal_tools.models import Role, User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(Role(name="bench", active=True))
+        # One hash for everyone: only verification speed is measured
+        pwhash = generate_password_hash(PASSWORD, method=app.config["PASSWORD_HASH_METHOD"])
+        db.session.add_all(
+            User(username=f"bench{i:04d}", password_hash=pwhash, display_name=f"Bench {i}", role_name="bench")
+            for i in range(users)
+        )
+        db.session.commit()
+
+
+def _start_server(db_url: str, hash_workers: int, args) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": db_url,
+        "PASSWORD_HASH_WORKERS": str(hash_workers),
+        "GUNICORN_WORKERS": str(args.gunicorn_workers),
+        "GUNICORN_THREADS": str(args.gunicorn_threads),
+        "PROMETHEUS_MULTIPROC_DIR": tempfile.mkdtemp(prefix="bench_metrics_"),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{port}",
+         "--access-logfile", "/dev/null", "wsgi:app"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base}/livez", timeout=1).ok:
+                return proc, base
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit(f"❌ gunicorn didn't start:\n{proc.stderr.read().decode()[-2000:]}")
+
+
+def _login(base: str, username: str) -> tuple[int, float]:
+    start = time.perf_counter()
+    resp = requests.post(
+        f"{base}/auth/login", data={"username": username, "password": PASSWORD},
+        allow_redirects=False, timeout=60,
+    )
+    return resp.status_code, time.perf_counter() - start
+
+
+def _probe(base: str, stop: threading.Event, samples: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        requests.get(f"{base}/livez", timeout=60)
+        samples.append(time.perf_counter() - start)
+        time.sleep(0.01)
+
+
+def _pct(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    return statistics.quantiles(values, n=100)[q - 1] * 1000 if len(values) > 1 else values[0] * 1000
+
+
+def run(db_url: str, hash_workers: int, args) -> None:
+    proc, base = _start_server(db_url, hash_workers, args)
+    try:
+        # Warm every worker (and its hashing pool) before timing
+        with ThreadPoolExecutor(args.concurrency) as ex:
+            list(ex.map(lambda i: _login(base, f"bench{i % args.users:04d}"), range(args.gunicorn_workers * 4)))
+
+        stop, probe_samples = threading.Event(), []
+        prober = threading.Thread(target=_probe, args=(base, stop, probe_samples), daemon=True)
+        prober.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as ex:
+            results = list(ex.map(lambda i: _login(base, f"bench{i % args.users:04d}"), range(args.logins)))
+        wall = time.perf_counter() - start
+        stop.set()
+        prober.join()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    ok = [t for status, t in results if status == 302]
+    busy = sum(1 for status, _ in results if status == 503)
+    other = len(results) - len(ok) - busy
+    print(
+        f"  hash workers {hash_workers}: {len(ok) / wall:7.1f} logins/s  "
+        f"p50 {_pct(ok, 50):7.1f} ms  p95 {_pct(ok, 95):7.1f} ms  busy {busy}  errors {other}  "
+        f"/livez p50 {_pct(probe_samples, 50):6.1f} ms  p95 {_pct(probe_samples, 95):6.1f} ms"
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    fd, path = tempfile.mkstemp(prefix="bench_logins_", suffix=".db")
+    os.close(fd)
+    db_url = f"sqlite:///{path}"
+    try:
+        _setup_db(db_url, args.users)
+        print(
+            f"🔐 {args.logins} logins from {args.concurrency} threads against "
+            f"{args.gunicorn_workers} workers × {args.gunicorn_threads} threads"
+        )
+        for raw in args.hash_workers.split(","):
+            run(db_url, int(raw), args)
+    finally:
+        os.remove(path)
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Microbenchmark the per-call overhead of the ``services.queries`` hot paths.
+
+Loads a synthetic school (see ``generate-synthetic-school.py``) into a
+throwaway SQLite database, then times each lookup ``--calls`` times two
+ways: the way it used to be written (a fresh ``select()`` built and compiled
+per call, rows turned into dicts) and the current prebuilt, bound-parameter
+statements returning ``PersonRecord`` objects::
+
+    python scripts/benchmark-queries.py
+    python scripts/benchmark-queries.py --scale 0.2 --calls 5000
+
+With small rosters on SQLite most of a call is Python, not the database, so
+the difference is mostly statement construction and compilation.
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def _load_script(name: str):
+    """Import a hyphenated script from this directory as a module."""
+    path = Path(__file__).resolve().parent / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Microbenchmark query-layer overhead")
+    parser.add_argument("--scale", type=float, default=1.0, help="Synthetic dataset scale")
+    parser.add_argument("--calls", type=int, default=2000, help="Calls per function and variant")
+    return parser.parse_args()
+
+
+# --- The pre-compiled-statement versions, kept here as the baseline ---
+
+def _legacy_cases():
+    from sqlalchemy import select
+
+    from bps_internal_tools.extensions import db
+    from bps_internal_tools.models import Course, Enrollment, People
+    from bps_internal_tools.services.replica import read_bind_arguments
+
+    def get_person(user_id):
+        row = db.session.execute(
+            select(People.user_id, People.full_name).where(People.user_id == user_id),
+            bind_arguments=read_bind_arguments(),
+        ).first()
+        return {"user_id": row[0], "full_name": row[1]} if row else None
+
+    def get_students_in_course(course_id):
+        stmt = (
+            select(People.user_id, People.full_name)
+            .join(Enrollment, Enrollment.user_id == People.user_id)
+            .where(Enrollment.course_id == course_id)
+            .where(Enrollment.role == "student")
+            .where(People.status == "active")
+            .order_by(People.full_name)
+        )
+        rows = db.session.execute(stmt, bind_arguments=read_bind_arguments()).all()
+        return [{"user_id": uid, "full_name": full} for (uid, full) in rows]
+
+    def get_teachers_in_course(course_id):
+        stmt = (
+            select(People.user_id, People.full_name)
+            .join(Enrollment, Enrollment.user_id == People.user_id)
+            .where(Enrollment.course_id == course_id)
+            .where(Enrollment.role == "teacher")
+            .order_by(People.full_name)
+        )
+        rows = db.session.execute(stmt, bind_arguments=read_bind_arguments()).all()
+        return [{"user_id": uid, "full_name": full} for (uid, full) in rows]
+
+    def get_course_info(course_id):
+        row = db.session.execute(
+            select(Course.short_name, Course.long_name).where(Course.course_id == course_id),
+            bind_arguments=read_bind_arguments(),
+        ).first()
+        if not row:
+            return {"short_name": "", "long_name": "Unknown Course"}
+        short, long_ = row
+        return {"short_name": short or "", "long_name": long_ or (short or "Unknown Course")}
+
+    return {
+        "get_person": get_person,
+        "get_students_in_course": get_students_in_course,
+        "get_teachers_in_course": get_teachers_in_course,
+        "get_course_info": get_course_info,
+    }
+
+
+def _time(fn, args) -> float:
+    from bps_internal_tools.extensions import db
+
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    elapsed = time.perf_counter() - start
+    db.session.rollback()
+    return elapsed * 1e6 / len(args)
+
+
+def main() -> None:
+    args = parse_args()
+    fd, path = tempfile.mkstemp(prefix="bench_queries_", suffix=".db")
+    os.close(fd)
+    # BaseConfig reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    try:
+        from sqlalchemy import select
+
+        from bps_internal_tools import create_app
+        from bps_internal_tools.extensions import db
+        from bps_internal_tools.models import Course, People
+        from bps_internal_tools.services import queries
+
+        synthetic = _load_script("generate-synthetic-school")
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            synthetic.load_fixture(db.session, synthetic.generate(args.scale))
+            rng = random.Random(7)
+            people = db.session.execute(select(People.user_id)).scalars().all()
+            courses = db.session.execute(select(Course.course_id).where(Course.course_id.like("c%"))).scalars().all()
+            samples = {
+                "get_person": [rng.choice(people) for _ in range(args.calls)],
+                "get_students_in_course": [rng.choice(courses) for _ in range(args.calls)],
+                "get_teachers_in_course": [rng.choice(courses) for _ in range(args.calls)],
+                "get_course_info": [rng.choice(courses) for _ in range(args.calls)],
+            }
+            print(f"⏱️  {args.calls} calls each, {len(people)} people, {len(courses)} courses")
+            for name, legacy in _legacy_cases().items():
+                current = getattr(queries, name)
+                # Warm both so first-call compilation isn't counted
+                legacy(samples[name][0])
+                current(samples[name][0])
+                before = _time(legacy, samples[name])
+                after = _time(current, samples[name])
+                print(f"  {name:<26} before {before:8.1f} µs/call  after {after:8.1f} µs/call  ({before / after:4.2f}×)")
+    finally:
+        os.remove(path)
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Fingerprint and precompress ``bps_internal_tools/static`` for production.
+
+Every file is copied to ``static/dist/<name>.<hash><ext>`` (the hash is of its
+content), text assets also get ``.gz`` and, if the ``brotli`` package is
+installed, ``.br`` siblings.  ``/static/...`` references inside stylesheets
+are rewritten to the fingerprinted names first, so the CSS hash changes
+when an image it uses does.  ``static/dist/manifest.json`` maps original to
+fingerprinted names; ``bps_internal_tools.static_assets`` reads it to emit
+those names from ``url_for('static', ...)`` and serve them with immutable
+caching::
+
+    python scripts/build-static-assets.py          # run by the Dockerfile
+
+Without a manifest (e.g. local development) the app serves the originals.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import shutil
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+STATIC_DIR = Path(__file__).resolve().parents[1] / "bps_internal_tools" / "static"
+DIST = "dist"
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+_CSS_REF_RE = re.compile(r"/static/([\w./-]+)")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress static assets")
+    parser.add_argument("--static-dir", default=str(STATIC_DIR), help="Static folder to build")
+    return parser.parse_args()
+
+
+def _write_variants(path: Path, data: bytes) -> list[str]:
+    path.write_bytes(data)
+    written = [path.name]
+    if path.suffix not in COMPRESSIBLE:
+        return written
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        path.with_name(path.name + ".gz").write_bytes(gz)
+        written.append(path.name + ".gz")
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            path.with_name(path.name + ".br").write_bytes(br)
+            written.append(path.name + ".br")
+    return written
+
+
+def build(static_dir: Path) -> dict:
+    dist = static_dir / DIST
+    shutil.rmtree(dist, ignore_errors=True)
+    dist.mkdir()
+    sources = sorted(
+        p for p in static_dir.rglob("*")
+        if p.is_file() and DIST not in p.relative_to(static_dir).parts
+    )
+    manifest = {}
+    # Stylesheets last so their references can point at fingerprinted files
+    for src in sorted(sources, key=lambda p: p.suffix == ".css"):
+        rel = src.relative_to(static_dir).as_posix()
+        data = src.read_bytes()
+        if src.suffix == ".css":
+            data = _CSS_REF_RE.sub(
+                lambda m: f"/static/{manifest.get(m.group(1), m.group(1))}", data.decode("utf-8")
+            ).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        target = dist / src.relative_to(static_dir).parent / f"{src.stem}.{digest}{src.suffix}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        variants = _write_variants(target, data)
+        manifest[rel] = target.relative_to(static_dir).as_posix()
+        print(f"  {rel} → {manifest[rel]} ({', '.join(v.rsplit('.', 1)[-1] for v in variants[1:]) or 'as is'})")
+    (dist / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return manifest
+
+
+def main() -> None:
+    args = parse_args()
+    if brotli is None:
+        print("⚠️  brotli not installed; writing gzip variants only")
+    manifest = build(Path(args.static_dir))
+    print(f"✅ {len(manifest)} assets fingerprinted into {Path(args.static_dir) / DIST}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Check that SQLite readers keep working while an import writes.
+
+Loads a synthetic school (see ``generate-synthetic-school.py``) into a
+throwaway SQLite file, then runs a long import (``--rounds`` full rewrites of
+``enrollments`` in one ``data_import_run`` transaction) while ``--readers``
+threads keep calling ``get_students_in_course``.  Each profile runs in its
+own process:
+
+* ``tuned`` – the app's ``SQLITE_*`` settings (WAL etc.)
+* ``sqlite-defaults`` – SQLite's own defaults (rollback journal, 2 MB cache),
+  i.e. what the app ran with before it set any pragmas
+
+::
+
+    python scripts/check-sqlite-concurrency.py
+    python scripts/check-sqlite-concurrency.py --profiles tuned --rounds 40 --readers 8
+
+For each profile it reports how many reads completed during the import, their
+latency and how many failed with "database is locked".  Exits non-zero if a
+``tuned`` reader failed or waited longer than ``--max-wait-ms``.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+PROFILES = {
+    "tuned": {},
+    "sqlite-defaults": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_MMAP_SIZE": "0",
+        "SQLITE_CACHE_SIZE_KB": "2000",
+    },
+}
+
+
+def _load_script(name: str):
+    """Import a hyphenated script from this directory as a module."""
+    path = Path(__file__).resolve().parent / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check SQLite reads during imports")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma separated profiles to compare")
+    parser.add_argument("--scale", type=float, default=10.0, help="Synthetic dataset scale")
+    parser.add_argument("--rounds", type=int, default=2, help="Enrollment rewrites inside the import transaction")
+    parser.add_argument("--readers", type=int, default=4, help="Reader threads")
+    parser.add_argument("--max-wait-ms", type=float, default=500, help="Slowest acceptable WAL read")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def _import(app, rounds: int) -> float:
+    from bps_internal_tools.extensions import db
+    from bps_internal_tools.models import Enrollment
+    from bps_internal_tools.services.sync import data_import_run
+
+    with app.app_context():
+        s = db.session
+        table = Enrollment.__table__
+        rows = [dict(r._mapping) for r in s.execute(table.select())]
+        start = time.perf_counter()
+        with data_import_run(s, "concurrency_check", trigger="script"):
+            for _ in range(rounds):
+                s.execute(table.delete())
+                s.execute(table.insert(), rows)
+        return time.perf_counter() - start
+
+
+def _read(app, courses, done: threading.Event, latencies: list, errors: list) -> None:
+    from sqlalchemy.exc import OperationalError
+
+    from bps_internal_tools.extensions import db
+    from bps_internal_tools.services.queries import get_students_in_course
+
+    rng = random.Random(threading.get_ident())
+    with app.app_context():
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                get_students_in_course(rng.choice(courses))
+            except OperationalError as exc:
+                errors.append(str(exc.orig))
+            else:
+                latencies.append(time.perf_counter() - start)
+            db.session.rollback()
+
+
+def child(args) -> dict:
+    from sqlalchemy import select
+
+    from bps_internal_tools import create_app
+    from bps_internal_tools.extensions import db
+    from bps_internal_tools.models import Course
+
+    synthetic = _load_script("generate-synthetic-school")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        synthetic.load_fixture(db.session, synthetic.generate(args.scale))
+        courses = db.session.execute(select(Course.course_id).where(Course.course_id.like("c%"))).scalars().all()
+        mode = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+
+    done, latencies, errors = threading.Event(), [], []
+    readers = [
+        threading.Thread(target=_read, args=(app, courses, done, latencies, errors), daemon=True)
+        for _ in range(args.readers)
+    ]
+    for t in readers:
+        t.start()
+    time.sleep(0.2)  # readers running before the import starts
+    latencies.clear()
+    import_s = _import(app, args.rounds)
+    done.set()
+    for t in readers:
+        t.join()
+    return {"mode": mode, "import_s": import_s, "latencies": latencies, "errors": errors}
+
+
+def main() -> None:
+    args = parse_args()
+    if args.child:
+        print(json.dumps(child(args)))
+        return
+
+    failed = False
+    print(f"🧪 {args.rounds} enrollment rewrites in one import, {args.readers} reader threads")
+    for profile in args.profiles.split(","):
+        fd, path = tempfile.mkstemp(prefix="sqlite_concurrency_", suffix=".db")
+        os.close(fd)
+        # BaseConfig reads these at import time, hence a process per profile
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}", **PROFILES[profile]}
+        try:
+            proc = subprocess.run(
+                [sys.executable, __file__, "--child", profile, "--scale", str(args.scale),
+                 "--rounds", str(args.rounds), "--readers", str(args.readers)],
+                env=env, capture_output=True, text=True, check=True,
+            )
+        finally:
+            for suffix in ("", "-wal", "-shm", "-journal"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        lat = sorted(result["latencies"]) or [0.0]
+        worst_ms = lat[-1] * 1000
+        print(
+            f"  {profile:<16} {result['mode']:<7} import {result['import_s']:6.2f}s  reads {len(result['latencies']):6d}  "
+            f"p50 {statistics.median(lat) * 1000:7.1f} ms  max {worst_ms:8.1f} ms  locked {len(result['errors'])}"
+        )
+        if profile == "tuned" and (result["errors"] or worst_ms > args.max_wait_ms):
+            failed = True
+    if failed:
+        raise SystemExit("❌ Readers were blocked by the import")
+    print("✅ Readers kept working during the import")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Check worker cold-start time against a recorded budget.
+
+Each run starts a fresh interpreter, imports ``bps_internal_tools`` and calls
+``create_app()``.  The best import and app-factory times over ``--runs``
+starts (the least disturbed by other load on the machine) are compared with
+``scripts/startup-budget.json``, and the
+check fails (exit code 1) when either exceeds its budget by more than the
+recorded tolerance (plus a few ms of slack so tiny timings aren't flaky), or when a module that should load lazily (gspread,
+pandas, Authlib…) is imported during start-up.  One extra start under
+``python -X importtime`` lists the slowest imports to help find the culprit::
+
+    python scripts/check-startup-budget.py            # check
+    python scripts/check-startup-budget.py --record   # accept current timings
+
+Re-record on the machine that runs the check after intentional changes;
+timings from different hardware aren't comparable.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+BUDGET_PATH = Path(__file__).resolve().parent / "startup-budget.json"
+
+DEFAULT_FORBIDDEN = ["gspread", "gspread_formatting", "google.oauth2", "authlib", "pandas"]
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from bps_internal_tools import create_app
+t1 = time.perf_counter()
+create_app()
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check app cold-start time against a budget")
+    parser.add_argument("--runs", type=int, default=7, help="Interpreter starts to take the best of")
+    parser.add_argument("--record", action="store_true", help="Write the measured timings as the new budget")
+    parser.add_argument("--top", type=int, default=10, help="Show this many slowest imports")
+    return parser.parse_args()
+
+
+def _importtime(stderr: str) -> dict:
+    """Cumulative microseconds per module from ``-X importtime`` output."""
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            out[name.strip()] = int(cumulative)
+        except ValueError:  # header row
+            continue
+    return out
+
+
+def measure_once(importtime: bool = False) -> tuple[dict, dict]:
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}"}
+    try:
+        proc = subprocess.run(
+            [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", PROBE],
+            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=False,
+        )
+    finally:
+        os.remove(db_path)
+    if proc.returncode != 0:
+        raise SystemExit(f"❌ App failed to start:\n{proc.stderr[-4000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1]), _importtime(proc.stderr)
+
+
+def main() -> None:
+    args = parse_args()
+    # First start warms the bytecode cache; don't count it
+    measure_once()
+    samples = [measure_once()[0] for _ in range(args.runs)]
+    _, imports = measure_once(importtime=True)
+
+    import_ms = min(s["import_ms"] for s in samples)
+    create_app_ms = min(s["create_app_ms"] for s in samples)
+    modules = set(samples[-1]["modules"])
+    print(f"⏱️  import bps_internal_tools: {import_ms:7.1f} ms (best of {args.runs})")
+    print(f"⏱️  create_app():             {create_app_ms:7.1f} ms")
+
+    third_party = sorted(
+        ((us, name) for name, us in imports.items() if not name.startswith("bps_internal_tools")), reverse=True
+    )
+    print("🐢 Slowest third-party imports (cumulative):")
+    for us, name in third_party[: args.top]:
+        print(f"   {us / 1000:7.1f} ms  {name}")
+
+    budget = json.loads(BUDGET_PATH.read_text()) if BUDGET_PATH.exists() else {}
+    forbidden = budget.get("forbidden_modules", DEFAULT_FORBIDDEN)
+
+    if args.record:
+        budget.update({
+            "import_ms": round(import_ms, 1),
+            "create_app_ms": round(create_app_ms, 1),
+            "tolerance": budget.get("tolerance", 0.3),
+            "slack_ms": budget.get("slack_ms", 15),
+            "forbidden_modules": forbidden,
+            "python": sys.version.split()[0],
+        })
+        BUDGET_PATH.write_text(json.dumps(budget, indent=2) + "\n")
+        print(f"💾 Budget written to {BUDGET_PATH.relative_to(PROJECT_ROOT)}")
+        return
+
+    if not budget:
+        raise SystemExit(f"❌ No budget at {BUDGET_PATH}; run with --record first")
+
+    failures = []
+    tolerance = budget.get("tolerance", 0.3)
+    slack_ms = budget.get("slack_ms", 15)
+    for key, measured in (("import_ms", import_ms), ("create_app_ms", create_app_ms)):
+        limit = budget[key] * (1 + tolerance) + slack_ms
+        if measured > limit:
+            failures.append(f"{key} {measured:.1f} ms exceeds budget {budget[key]} ms (limit {limit:.1f} ms)")
+    for name in forbidden:
+        if name in modules:
+            failures.append(f"{name} is imported at start-up (should load on first use)")
+
+    if failures:
+        for f in failures:
+            print(f"❌ {f}")
+        raise SystemExit(1)
+    print("✅ Start-up within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Generate a synthetic school dataset for load testing and benchmarks.
+
+The generator produces the same files the app consumes in production, sized
+relative to Brockton School (``--scale 1``) so importers and queries can be
+measured at 1x, 10x and 100x our real data:
+
+* ``canvas/courses.csv``, ``canvas/users.csv``, ``canvas/enrollments.csv`` –
+  shaped like a Canvas SIS export (input for ``update-db-from-canvas.py``)
+* ``myschool.csv`` – shaped like the MySchool export uploaded to SIS Sync
+
+With ``--db`` the same dataset is also loaded into a database as a fixture
+(people, courses, enrollments, grade sections, roles and Google auth users).
+
+Usage (from repository root)::
+
+    python scripts/generate-synthetic-school.py --scale 10 --out env/synthetic/10x
+    python scripts/generate-synthetic-school.py --scale 1 --db sqlite:///bench.db
+
+Output is deterministic for a given ``--scale`` and ``--seed``.
+"""
+
+import argparse
+import csv
+import os
+import random
+from typing import Dict, List
+
+# Roughly one Brockton School
+BASE_STUDENTS = 500
+BASE_TEACHERS = 60
+BASE_COURSES = 220
+STUDENT_COURSES = 8
+GRADES = ["K", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12"]
+TERMS = ["BPS_W25", "BPS_DP24", "BPS_DP25"]
+OLD_TERMS = ["BPS_W24", "BPS_DP23"]
+EMAIL_DOMAIN = "brocktonschool.com"
+
+FIRST_NAMES = [
+    "Aiden", "Amelia", "Arjun", "Ava", "Benjamin", "Chloe", "Daniel", "Ella", "Ethan", "Grace",
+    "Hannah", "Isaac", "Jack", "Julia", "Kai", "Leah", "Liam", "Lucas", "Maya", "Mia",
+    "Noah", "Olivia", "Owen", "Priya", "Ryan", "Sophie", "Thomas", "Yuki", "Zara", "Zoe",
+]
+LAST_NAMES = [
+    "Anderson", "Brown", "Chen", "Das", "Evans", "Fraser", "Gill", "Harris", "Ito", "Jones",
+    "Kim", "Lee", "MacDonald", "Nguyen", "O'Brien", "Patel", "Quinn", "Ross", "Singh", "Smith",
+    "Tanaka", "Wilson", "Wong", "Young", "Zhang",
+]
+SUBJECTS = [
+    "English", "Mathematics", "Science", "Social Studies", "French", "Spanish", "Art", "Music",
+    "Physical Education", "Drama", "Biology", "Chemistry", "Physics", "Computer Science", "History",
+]
+
+CANVAS_USER_FIELDS = [
+    "user_id", "integration_id", "authentication_provider_id", "login_id", "first_name", "last_name",
+    "full_name", "sortable_name", "short_name", "email", "status",
+]
+CANVAS_COURSE_FIELDS = [
+    "course_id", "integration_id", "short_name", "long_name", "account_id", "term_id", "status",
+    "start_date", "end_date", "course_format", "blueprint_course_id",
+]
+CANVAS_ENROLLMENT_FIELDS = [
+    "course_id", "user_id", "role", "role_id", "section_id", "status", "associated_user_id",
+    "limit_section_privileges",
+]
+MYSCHOOL_FIELDS = ["USER ID", "NAME", "SURNAME", "EMAIL", "CLASS LEVEL"]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic school dataset")
+    parser.add_argument("--scale", type=float, default=1.0, help="Size relative to our school (1, 10, 100…)")
+    parser.add_argument("--seed", type=int, default=2025, help="Random seed")
+    parser.add_argument("--out", default=None, help="Directory to write CSVs to (default env/synthetic/<scale>x)")
+    parser.add_argument("--db", default=None, help="Optionally load the dataset into this database URL")
+    return parser.parse_args()
+
+
+def _letters(num: int) -> str:
+    out = ""
+    while True:
+        num, rem = divmod(num, 26)
+        out = chr(ord("a") + rem) + out
+        if not num:
+            return out
+
+
+def _person(rng: random.Random, num: int, *, student: bool, grade: str = "") -> Dict:
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES)
+    # Student addresses carry digits, staff ones don't (see auth default roles)
+    if student:
+        local = f"{first[0]}{last}{num}"
+    else:
+        local = f"{first}.{last}.{_letters(num)}"
+    local = local.lower().replace("'", "")
+    email = f"{local}@{EMAIL_DOMAIN}"
+    return {
+        "user_id": f"u{num:06d}",
+        "integration_id": "",
+        "authentication_provider_id": "114",
+        "login_id": email,
+        "first_name": first,
+        "last_name": last,
+        "full_name": f"{first} {last}",
+        "sortable_name": f"{last}, {first}",
+        "short_name": f"{first} {last}",
+        "email": email,
+        "status": "active" if rng.random() > 0.02 else "suspended",
+        "grade": grade,
+    }
+
+
+def generate(scale: float = 1.0, seed: int = 2025) -> Dict[str, List[Dict]]:
+    """Return a synthetic dataset as lists of row dicts."""
+    rng = random.Random(seed)
+    n_students = max(1, int(BASE_STUDENTS * scale))
+    n_teachers = max(1, int(BASE_TEACHERS * scale))
+    n_courses = max(1, int(BASE_COURSES * scale))
+
+    teachers = [_person(rng, 900000 + i, student=False) for i in range(n_teachers)]
+    students = [_person(rng, 100000 + i, student=True, grade=rng.choice(GRADES)) for i in range(n_students)]
+
+    courses, enrollments, grade_sections = [], [], []
+    for i in range(n_courses):
+        subject = rng.choice(SUBJECTS)
+        grade = rng.choice(GRADES)
+        term = rng.choice(TERMS) if rng.random() > 0.2 else rng.choice(OLD_TERMS)
+        courses.append({
+            "course_id": f"c{i:06d}",
+            "integration_id": "",
+            "short_name": f"{subject[:4].upper()}-{grade}-{i}",
+            "long_name": f"{subject} {grade} ({term})",
+            "account_id": "A1",
+            "term_id": term,
+            "status": "active",
+            "start_date": "",
+            "end_date": "",
+            "course_format": "",
+            "blueprint_course_id": "",
+        })
+
+    # One homeroom "grade" course per grade, referenced by grade sections
+    for g in GRADES:
+        cid = f"g{g.zfill(2)}"
+        courses.append({
+            "course_id": cid, "integration_id": "", "short_name": f"Grade {g}",
+            "long_name": f"Grade {g} Homeroom", "account_id": "A1", "term_id": TERMS[0],
+            "status": "active", "start_date": "", "end_date": "", "course_format": "",
+            "blueprint_course_id": "",
+        })
+        grade_sections.append({
+            "display_name": f"Grade {g}",
+            "school_level": "junior_school" if g in GRADES[:8] else "senior_school",
+            "reference_course_id": cid,
+            "reference_is_section": False,
+        })
+
+    regular = [c for c in courses if c["course_id"].startswith("c")]
+    for c in regular:
+        teacher = rng.choice(teachers)
+        enrollments.append({
+            "course_id": c["course_id"], "user_id": teacher["user_id"], "role": "teacher",
+            "role_id": 4, "section_id": f"s{c['course_id']}", "status": "active",
+            "associated_user_id": "", "limit_section_privileges": "false",
+        })
+    for s in students:
+        for c in rng.sample(regular, min(STUDENT_COURSES, len(regular))):
+            enrollments.append({
+                "course_id": c["course_id"], "user_id": s["user_id"], "role": "student",
+                "role_id": 3, "section_id": f"s{c['course_id']}", "status": "active",
+                "associated_user_id": "", "limit_section_privileges": "false",
+            })
+        enrollments.append({
+            "course_id": f"g{s['grade'].zfill(2)}", "user_id": s["user_id"], "role": "student",
+            "role_id": 3, "section_id": "", "status": "active",
+            "associated_user_id": "", "limit_section_privileges": "false",
+        })
+
+    myschool = [
+        {
+            "USER ID": str(int(p["user_id"][1:])),
+            "NAME": p["first_name"],
+            # A small share of MySchool records changed since the last import
+            "SURNAME": p["last_name"] if rng.random() > 0.05 else rng.choice(LAST_NAMES),
+            "EMAIL": p["email"],
+            "CLASS LEVEL": p["grade"],
+        }
+        for p in students + teachers
+        if rng.random() > 0.01  # and a few have left
+    ]
+
+    return {
+        "people": teachers + students,
+        "courses": courses,
+        "enrollments": enrollments,
+        "grade_sections": grade_sections,
+        "myschool": myschool,
+    }
+
+
+def _write_csv(path: str, fieldnames: List[str], rows: List[Dict]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(rows)
+
+
+def write_csvs(dataset: Dict[str, List[Dict]], out_dir: str) -> None:
+    """Write the Canvas export and MySchool CSVs for *dataset* under *out_dir*."""
+    canvas_dir = os.path.join(out_dir, "canvas")
+    os.makedirs(canvas_dir, exist_ok=True)
+    _write_csv(os.path.join(canvas_dir, "users.csv"), CANVAS_USER_FIELDS, dataset["people"])
+    _write_csv(os.path.join(canvas_dir, "courses.csv"), CANVAS_COURSE_FIELDS, dataset["courses"])
+    _write_csv(os.path.join(canvas_dir, "enrollments.csv"), CANVAS_ENROLLMENT_FIELDS, dataset["enrollments"])
+    _write_csv(os.path.join(out_dir, "myschool.csv"), MYSCHOOL_FIELDS, dataset["myschool"])
+
+
+def load_fixture(session, dataset: Dict[str, List[Dict]]) -> None:
+    """Load *dataset* into the database behind *session* (tables must exist)."""
+    from bps_internal_tools.models import Course, Enrollment, GradeSection, People, Role, RoleTool, User
+    from bps_internal_tools.services.people import sync_email_index
+    from bps_internal_tools.services.teacher_courses import rebuild_teacher_courses
+
+    def only(model, row):
+        cols = model.__table__.columns.keys()
+        return {k: (v if v != "" else None) for k, v in row.items() if k in cols}
+
+    session.execute(People.__table__.insert(), [only(People, p) for p in dataset["people"]])
+    sync_email_index(session)
+    session.execute(Course.__table__.insert(), [only(Course, c) for c in dataset["courses"]])
+    session.execute(Enrollment.__table__.insert(), [only(Enrollment, e) for e in dataset["enrollments"]])
+    session.execute(GradeSection.__table__.insert(), dataset["grade_sections"])
+    rebuild_teacher_courses(session)
+
+    for name, tools in (("admin", ["*"]), ("staff_lite", ["toc_attendance"]), ("student_lite", [])):
+        role = Role(name=name, active=True)
+        session.add(role)
+        session.flush()
+        for slug in tools:
+            session.add(RoleTool(role_id=role.id, tool_slug=slug))
+    session.execute(User.__table__.insert(), [
+        {
+            "username": p["email"],
+            "password_hash": "",
+            "display_name": p["full_name"],
+            "role_name": "student_lite" if p["grade"] else "staff_lite",
+            "active": True,
+            "auth_provider": "google",
+            "canvas_user_id": p["user_id"],
+        }
+        for p in dataset["people"]
+    ])
+    session.commit()
+
+
+def main() -> None:
+    args = parse_args()
+    dataset = generate(args.scale, args.seed)
+    out_dir = args.out or os.path.join("env", "synthetic", f"{args.scale:g}x")
+    write_csvs(dataset, out_dir)
+    print(
+        f"✅ {len(dataset['people'])} people, {len(dataset['courses'])} courses, "
+        f"{len(dataset['enrollments'])} enrollments written to {out_dir}"
+    )
+
+    if args.db:
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import Session
+        from bps_internal_tools.extensions import db
+
+        engine = create_engine(args.db, future=True)
+        db.metadata.create_all(engine)
+        with Session(engine) as session:
+            load_fixture(session, dataset)
+        print(f"✅ Fixture loaded into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
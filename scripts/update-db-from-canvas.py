@@ -17,17 +17,30 @@ Usage (from repository root)::
 
 The database URL defaults to the ``DATABASE_URL`` environment variable and the
 CSV directory defaults to ``env/sis_export``.
+
+With ``--fetch`` the CSVs are not read from ``--dir``; instead a Canvas account
+report (``provisioning_csv`` by default) is requested through the API, polled
+until ready and streamed to disk as a zip.  The CSVs are then read directly out
+of the archive without being extracted::
+
+    python scripts/update-db-from-canvas.py --fetch
+
+The Canvas connection uses ``CANVAS_API_URL``, ``CANVAS_API_TOKEN`` and
+``CANVAS_ACCOUNT_ID``, matching the app configuration.
 """
 
 import argparse
 import os
-from typing import Optional, Type
 
-import pandas as pd
-from sqlalchemy import create_engine, delete
+from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
 
-from bps_internal_tools.models import Base, Course, Enrollment
+from bps_internal_tools.config import BaseConfig
+from bps_internal_tools.models import Base
+from bps_internal_tools.services.canvas_import import fetch_canvas_report, import_canvas_export
+from bps_internal_tools.services.locks import LockBusy
+from bps_internal_tools.services.sync import data_import_run
+from bps_internal_tools.sqlite_tuning import configure_engine, pragmas_from_config
 
 
 def parse_args() -> argparse.Namespace:
@@ -44,62 +57,49 @@ def parse_args() -> argparse.Namespace:
         default=os.getenv("SIS_EXPORT_DIR", "env/sis_export"),
         help="Directory containing courses.csv, users.csv, enrollments.csv",
     )
+    parser.add_argument(
+        "--fetch",
+        action="store_true",
+        help="Fetch the CSVs from the Canvas reports API instead of --dir",
+    )
+    parser.add_argument(
+        "--report",
+        default=os.getenv("CANVAS_REPORT_TYPE", "provisioning_csv"),
+        help="Canvas account report to request with --fetch (provisioning_csv or sis_export_csv)",
+    )
+    parser.add_argument(
+        "--term",
+        default=os.getenv("CANVAS_REPORT_TERM_ID"),
+        help="Optional Canvas enrollment term id to restrict the fetched report to",
+    )
+    parser.add_argument(
+        "--download-dir",
+        default=os.getenv("CANVAS_REPORT_DIR", "env/canvas_reports"),
+        help="Where fetched report archives are written",
+    )
     return parser.parse_args()
 
 
-def load_csv(path: str) -> Optional[pd.DataFrame]:
-    """Load a CSV file into a DataFrame if it exists."""
-    if not os.path.exists(path):
-        print(f"⚠️  CSV not found: {path}")
-        return None
-    return pd.read_csv(path)
-
-
-def upsert_from_df(session: Session, model: Type[Base], df: pd.DataFrame, pk: str) -> None:
-    """Upsert rows from *df* into *model* and remove missing rows."""
-    if df is None:
-        return
-
-    csv_ids = set()
-    for _, row in df.iterrows():
-        data = {k: (None if pd.isna(v) else v) for k, v in row.items()}
-        pk_val = data[pk]
-        csv_ids.add(pk_val)
-        obj = session.get(model, pk_val)
-        if obj:
-            for col, val in data.items():
-                setattr(obj, col, val)
-        else:
-            session.add(model(**data))
-
-    session.flush()
-    # Remove rows not present in the CSV
-    if csv_ids:
-        session.query(model).filter(~getattr(model, pk).in_(csv_ids)).delete(
-            synchronize_session=False
-        )
-    session.commit()
-
-
-def replace_enrollments(session: Session, df: pd.DataFrame) -> None:
-    """Replace the enrollments table contents with *df* (mirror CSV)."""
-    if df is None:
-        return
-
-    session.execute(delete(Enrollment))
-
-    # ``bulk_insert_mappings`` can't handle NaN values – they must be converted
-    # to ``None`` so SQLAlchemy can emit proper ``NULL`` values.  Using
-    # ``DataFrame.where`` isn't sufficient for numeric columns because pandas
-    # will coerce ``None`` back to ``NaN`` when the dtype is float, so we build
-    # the row dictionaries manually and filter with :func:`pd.isna`.
-    rows = []
-    for _, row in df.iterrows():
-        rows.append({k: (None if pd.isna(v) else v) for k, v in row.items()})
-
-    if rows:
-        session.bulk_insert_mappings(Enrollment, rows)
-    session.commit()
+def fetch_report(args: argparse.Namespace) -> str:
+    """Request a Canvas account report and stream it into ``--download-dir``."""
+    base_url = os.getenv("CANVAS_API_URL")
+    token = os.getenv("CANVAS_API_TOKEN")
+    if not base_url or not token:
+        raise SystemExit("❌ --fetch needs CANVAS_API_URL and CANVAS_API_TOKEN")
+
+    print(f"⏳ Requesting {args.report} report from Canvas…")
+    dest = fetch_canvas_report(
+        args.download_dir,
+        base_url=base_url,
+        token=token,
+        account_id=os.getenv("CANVAS_ACCOUNT_ID", "1"),
+        report=args.report,
+        term_id=args.term,
+        poll_interval=float(os.getenv("CANVAS_REPORT_POLL_SECONDS", "5")),
+        timeout=float(os.getenv("CANVAS_REPORT_TIMEOUT_SECONDS", "900")),
+    )
+    print(f"📦 Report saved to {dest}")
+    return dest
 
 
 def main() -> None:
@@ -108,20 +108,26 @@ def main() -> None:
         raise SystemExit("❌ Provide a database URL via --db or DATABASE_URL env var")
 
     engine = create_engine(args.db, future=True)
+    # Same WAL/busy_timeout set-up as the app, so the import doesn't block its readers
+    configure_engine(engine, pragmas_from_config(vars(BaseConfig)))
     # Ensure tables exist (no-op if already present)
     Base.metadata.create_all(engine)
 
-    csv_dir = args.dir
-    courses_df = load_csv(os.path.join(csv_dir, "courses.csv"))
-    enrollments_df = load_csv(os.path.join(csv_dir, "enrollments.csv"))
-
     with Session(engine) as session:
-        upsert_from_df(session, Course, courses_df, "course_id")
-        replace_enrollments(session, enrollments_df)
+        try:
+            # Shares the app's import lock so this never overlaps a scheduled
+            # sync or a SIS Sync upload
+            with data_import_run(session, "canvas_import", trigger="script") as run:
+                if args.fetch:
+                    counts = import_canvas_export(session, archive_path=fetch_report(args))
+                else:
+                    counts = import_canvas_export(session, csv_dir=args.dir)
+                run.detail = ", ".join(f"{k}={v}" for k, v in counts.items())
+        except LockBusy:
+            raise SystemExit("❌ Another import is already running; try again later")
 
     print("✅ Canvas SIS data imported")
 
 
 if __name__ == "__main__":
     main()
-